@@ -126,8 +126,9 @@ class Writer(AbstractWriter, CHelperMixin):
         body = ""
         add_str_template = self.make_std_meta_adm_build_template(cs.META)
 
+        ns_lower = self.adm.norm_namespace.lower()
         for obj in self.adm.mdat:
-            _,fname,_ = campch.make_meta_function(self.adm, obj)
+            _,fname,_ = campch.make_meta_function(ns_lower, obj)
             ari       = cu.make_ari_name(self.adm.norm_namespace, cs.META, obj)
 
             body += add_str_template.format("0", ari, fname)
@@ -144,9 +145,10 @@ class Writer(AbstractWriter, CHelperMixin):
         body = ""
         add_str = self.make_std_meta_adm_build_template(cs.CONST)
 
+        ns_lower = self.adm.norm_namespace.lower()
         for obj in self.adm.const:
             parms_tf = "0"
-            _,fname,_ = campch.make_constant_function(self.adm, obj)
+            _,fname,_ = campch.make_constant_function(ns_lower, obj)
             ari       = cu.make_ari_name(self.adm.norm_namespace, cs.CONST, obj)
 
             #FIXME: can const have parameters?
@@ -167,9 +169,10 @@ class Writer(AbstractWriter, CHelperMixin):
         body = ""
         add_str = self.make_std_meta_adm_build_template(cs.EDD)
 
+        ns_lower = self.adm.norm_namespace.lower()
         for obj in self.adm.edd:
             parms_tf = "0"
-            _,fname,_ = campch.make_collect_function(self.adm, obj)
+            _,fname,_ = campch.make_collect_function(ns_lower, obj)
             ari       = cu.make_ari_name(self.adm.norm_namespace, cs.EDD, obj)
 
             if obj.parmspec and obj.parmspec.items:
@@ -112,8 +112,9 @@ class Writer(AbstractWriter, CHelperMixin):
             "\n}}"
             "\n\n")
 
+        ns_lower = self.adm.norm_namespace.lower()
         for obj in self.adm.mdat:
-            _,_,signature = campch.make_meta_function(self.adm, obj)
+            _,_,signature = campch.make_meta_function(ns_lower, obj)
             outfile.write(metadata_funct_str.format(signature, obj.value))
 
     #
@@ -132,8 +133,9 @@ class Writer(AbstractWriter, CHelperMixin):
             "\n}}"
             "\n")
 
+        ns_lower = self.adm.norm_namespace.lower()
         for obj in self.adm.const:
-            _,_,signature = campch.make_constant_function(self.adm, obj)
+            _,_,signature = campch.make_constant_function(ns_lower, obj)
             outfile.write(const_function_str.format(signature, getattr(obj, 'value', '')))
 
     #
@@ -162,8 +164,9 @@ class Writer(AbstractWriter, CHelperMixin):
             "\n\n")
         table_function_end_str = "\treturn table;\n}\n\n"
 
+        ns_lower = self.adm.norm_namespace.lower()
         for obj in self.adm.tblt:
-            basename,_,signature = campch.make_table_function(self.adm, obj)
+            basename,_,signature = campch.make_table_function(ns_lower, obj)
             description          = campch.multiline_comment_format(obj.description or '')
 
             outfile.write(table_function_begin_str.format(description, signature))
@@ -194,8 +197,9 @@ class Writer(AbstractWriter, CHelperMixin):
             "\n")
         edd_function_end_str = "\treturn result;\n}\n\n"
 
+        ns_lower = self.adm.norm_namespace.lower()
         for obj in self.adm.edd:
-            basename,_,signature = campch.make_collect_function(self.adm, obj)
+            basename,_,signature = campch.make_collect_function(ns_lower, obj)
             description          = campch.multiline_comment_format(obj.description or '')
             outfile.write(edd_function_begin_str.format(description, signature))
 
@@ -226,8 +230,9 @@ class Writer(AbstractWriter, CHelperMixin):
             "\n")
         ctrl_function_end_str = "\treturn result;\n}\n\n"
 
+        ns_lower = self.adm.norm_namespace.lower()
         for obj in self.adm.ctrl:
-            basename,_,signature = campch.make_control_function(self.adm, obj)
+            basename,_,signature = campch.make_control_function(ns_lower, obj)
             description          = campch.multiline_comment_format(obj.description or '')
             outfile.write(ctrl_function_begin_str.format(description, signature))
 
@@ -255,8 +260,9 @@ class Writer(AbstractWriter, CHelperMixin):
             "\n")
         op_function_end_str = "\treturn result;\n}\n\n"
 
+        ns_lower = self.adm.norm_namespace.lower()
         for obj in self.adm.oper:
-            basename,_,signature = campch.make_operator_function(self.adm, obj)
+            basename,_,signature = campch.make_operator_function(ns_lower, obj)
             description          = campch.multiline_comment_format(obj.description or '')
             outfile.write(op_function_begin_str.format(description, signature))
 
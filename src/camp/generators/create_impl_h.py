@@ -120,8 +120,9 @@ class Writer(AbstractWriter, CHelperMixin):
     #
     def write_metadata_functions(self, outfile):
         outfile.write("\n/* Metadata Functions */\n")
+        ns_lower = self.adm.norm_namespace.lower()
         for obj in self.adm.mdat:
-            _,_,signature = campch.make_meta_function(self.adm, obj)
+            _,_,signature = campch.make_meta_function(ns_lower, obj)
             outfile.write(signature + ";\n")
 
     #
@@ -130,8 +131,9 @@ class Writer(AbstractWriter, CHelperMixin):
     #
     def write_constant_functions(self, outfile):
         outfile.write("\n/* Constant Functions */\n")
+        ns_lower = self.adm.norm_namespace.lower()
         for obj in self.adm.const:
-            _,_,signature = campch.make_constant_function(self.adm, obj)
+            _,_,signature = campch.make_constant_function(ns_lower, obj)
             outfile.write(signature + ";\n")
 
     #
@@ -141,8 +143,9 @@ class Writer(AbstractWriter, CHelperMixin):
     #
     def write_collect_functions(self, outfile):
         outfile.write("\n/* Collect Functions */\n")
+        ns_lower = self.adm.norm_namespace.lower()
         for obj in self.adm.edd:
-            _,_,signature = campch.make_collect_function(self.adm, obj)
+            _,_,signature = campch.make_collect_function(ns_lower, obj)
             outfile.write(signature + ";\n")
 
     #
@@ -152,8 +155,9 @@ class Writer(AbstractWriter, CHelperMixin):
     #
     def write_control_functions(self, outfile):
         outfile.write("\n\n/* Control Functions */\n")
+        ns_lower = self.adm.norm_namespace.lower()
         for obj in self.adm.ctrl:
-            _,_,signature = campch.make_control_function(self.adm, obj)
+            _,_,signature = campch.make_control_function(ns_lower, obj)
             outfile.write(signature + ";\n")
 
     #
@@ -163,8 +167,9 @@ class Writer(AbstractWriter, CHelperMixin):
     #
     def write_operator_functions(self, outfile):
         outfile.write("\n\n/* OP Functions */\n")
+        ns_lower = self.adm.norm_namespace.lower()
         for obj in self.adm.oper:
-            _,_,signature = campch.make_operator_function(self.adm, obj)
+            _,_,signature = campch.make_operator_function(ns_lower, obj)
             outfile.write(signature + ";\n")
 
     #
@@ -174,6 +179,7 @@ class Writer(AbstractWriter, CHelperMixin):
     #
     def write_table_functions(self, outfile):
         outfile.write("\n\n/* Table Build Functions */\n")
+        ns_lower = self.adm.norm_namespace.lower()
         for obj in self.adm.tblt:
-            _,_,signature = campch.make_table_function(self.adm, obj)
+            _,_,signature = campch.make_table_function(ns_lower, obj)
             outfile.write(signature + ";\n")
@@ -27,7 +27,7 @@ import logging
 import re
 import datetime
 import os
-import fileinput
+import functools
 from typing import TextIO
 
 from camp.generators.lib import camputil as cu
@@ -38,6 +38,10 @@ from ace import models
 
 LOGGER = logging.getLogger(__name__)
 
+#: Leading lines of the CONST and MDAT sections
+_CONST_HEADER = ("", "", "-- CONST")
+_MDAT_HEADER = ("", "", "-- MDAT")
+
 #:FIXME temporary removal until SQL procedures are updated
 #USE_UPDATE_RECORD = True
 
@@ -50,12 +54,41 @@ LOGGER = logging.getLogger(__name__)
 # Escape single quotes in a string (to clean SQL input)
 # TODO: Currently only used on descriptions; should update to escape all strings
 # TODO: switch to using a library to sanitize input more fully
+# Descriptions repeat heavily within an ADM, so results are memoized
+@functools.lru_cache(maxsize=4096)
 def escape_description_sql(val):
     if val is None:
         return None
     return val.replace("'","''")
 
 
+# Results of insert_line_before_anchor()
+LINE_INSERTED = 'inserted'
+LINE_PRESENT = 'present'
+ANCHOR_MISSING = 'anchor missing'
+
+# Insert line_to_add in front of the line of the file at path holding the
+# anchor text. The file is left untouched if it already contains line_to_add
+# or if the anchor is not found. The file is rewritten in place, keeping its
+# permissions.
+# Returns LINE_INSERTED, LINE_PRESENT, or ANCHOR_MISSING.
+def insert_line_before_anchor(path, line_to_add, anchor):
+    with open(path, "r") as infile:
+        data = infile.read()
+
+    if line_to_add in data:
+        return LINE_PRESENT
+
+    idx = data.find(anchor)
+    if idx < 0:
+        return ANCHOR_MISSING
+    idx = data.rfind("\n", 0, idx) + 1
+
+    with open(path, "w") as outfile:
+        outfile.write(data[:idx] + line_to_add + data[idx:])
+    return LINE_INSERTED
+
+
 class Writer(AbstractWriter):
     ''' The SQL file writer.
 
@@ -75,6 +108,8 @@ class Writer(AbstractWriter):
         self._var_prefix = "@" if self.dialect == 'mysql' else ''
         self._vars_def = set()
         self._vars_use = set()
+        # Memoized create_insert_*() results, keyed by factory and arguments
+        self._templates = {}
 
         # The first half of the namespace
         ns = self.adm.norm_namespace
@@ -105,8 +140,10 @@ class Writer(AbstractWriter):
         head += self.body_pre()
         body += self.body_post()
 
-        for line in head + body:
-            outfile.write(line)
+        # The head declares variables registered while generating the body,
+        # so neither can be streamed; serialize each without concatenating them
+        for lines in (head, body):
+            outfile.write("\n".join(lines))
             outfile.write("\n")
 
     def _var_name(self, name, define=True):
@@ -175,11 +212,16 @@ class Writer(AbstractWriter):
     def create_insert_obj_metadata_template(self, obj_type):
         ''' format with 0=object type enum, 1={} (to be filled by caller), 2=highlevel namespace, 3={} (to be filled by caller)
         '''
+        key = ('obj_metadata', obj_type)
+        if key in self._templates:
+            return self._templates[key]
+
         general_template = "CALL SP__insert_obj_metadata({}, '{}', {}, {});"
 
         # convert to object type enumeration to decimal for function
         obj_type_enum = str(int(cs.ari_type_enum(obj_type), 16))
         formatted = general_template.format(obj_type_enum, "{}", self._sql_ns, "{}")
+        self._templates[key] = formatted
         return formatted
 
 
@@ -188,10 +230,16 @@ class Writer(AbstractWriter):
     # Returns a tuple of the (insert_formal_parmspec function template, insert_formal_parmspec_entry function template)
     # Format the former with number of parmspec, fp_id, format the latter with fp_id, enum of the entry, entry name, entry type
     def create_insert_formal_parmspec_templates(self, desc_template="{}"):
+        key = ('formal_parmspec', desc_template)
+        if key in self._templates:
+            return self._templates[key]
+
         basic_template = "CALL SP__insert_formal_parmspec({}, '{}', {});"
         entry_template = "CALL SP__insert_formal_parmspec_entry({}, {}, '{}', '{}', null, " + self._var_name("r_fp_ent") + ");"
 
-        return basic_template.format("{}", desc_template, "{}", {}), entry_template
+        templates = basic_template.format("{}", desc_template, "{}", {}), entry_template
+        self._templates[key] = templates
+        return templates
 
     # Helper function for insert_tnvc_collection template and insert_tnvc_entry template
     # obj_type is the type of object in the collection (OP, etc.)
@@ -220,12 +268,18 @@ class Writer(AbstractWriter):
     # description_format is any formatting you wish to impose on the description
     # Returns template for insert_ac_id function, format with number of acs and the description
     def create_insert_ac_id_template(self, obj_type, description_format="{}"):
+        key = ('ac_id', obj_type, description_format)
+        if key in self._templates:
+            return self._templates[key]
+
         function_template = "CALL SP__insert_ac_id({0}, '{1}', {2});"
         obj_id_template = "{}_ac_id"
 
         obj_type_str = cs.get_lname(obj_type).lower()
         obj_id = self._var_name(obj_id_template.format(obj_type_str))
-        return function_template.format("{}", description_format, obj_id)
+        formatted = function_template.format("{}", description_format, obj_id)
+        self._templates[key] = formatted
+        return formatted
 
 
     # Returns a tuple of the (definition id,object id) of the passed definition object
@@ -392,10 +446,10 @@ class Writer(AbstractWriter):
 
             if parmspec:
                 self._var_name(edd_fp_id)
-                lines += [insert_formal_parmspec_template.format(num_parmspec, name, edd_fp_id, edd_obj_id)]
+                lines.append(insert_formal_parmspec_template.format(num_parmspec, name, edd_fp_id, edd_obj_id))
 
                 for parm in parmspec:
-                    lines += [insert_entry_template.format(edd_fp_id, parm.position + 1, parm.name, parm.type)]
+                    lines.append(insert_entry_template.format(edd_fp_id, parm.position + 1, parm.name, parm.type))
 
             # Only put actual definition here if no parmspec
             if not parmspec:
@@ -405,7 +459,7 @@ class Writer(AbstractWriter):
                     edd_actual_def_template.format(edd_obj_id, name, edd_act_id),
                 ]
             else:
-                lines += [edd_formal_def_template.format(edd_obj_id, desc, edd_fp_id, etype, edd_def_id)]
+                lines.append(edd_formal_def_template.format(edd_obj_id, desc, edd_fp_id, etype, edd_def_id))
 
         return lines
 
@@ -442,15 +496,15 @@ class Writer(AbstractWriter):
 
                 # UNK has one fewer parameter
                 if t == "unk":
-                    lines += [tnvc_unk_entry_template.format(in_type.position + 1, in_type.position + 1)]
+                    lines.append(tnvc_unk_entry_template.format(in_type.position + 1, in_type.position + 1))
                 else:
-                    lines += [tnvc_entry_template.format(t, in_type.position + 1, "null", in_type.position + 1)]
+                    lines.append(tnvc_entry_template.format(t, in_type.position + 1, "null", in_type.position + 1))
 
             # TODO: UNK is not a valid type, comment the actual_def for this out for now until ADM resolved
             if result_type.upper() == 'UNK':
-                lines += ["-- " + actual_def_template.format(oper_obj_id, oper_desc, result_type, len(oper.in_type), oper_act_id)]
+                lines.append("-- " + actual_def_template.format(oper_obj_id, oper_desc, result_type, len(oper.in_type), oper_act_id))
             else:
-                lines += [actual_def_template.format(oper_obj_id, oper_desc, result_type, len(oper.in_type), oper_act_id)]
+                lines.append(actual_def_template.format(oper_obj_id, oper_desc, result_type, len(oper.in_type), oper_act_id))
 
         return lines
 
@@ -490,15 +544,13 @@ class Writer(AbstractWriter):
 
             for item in postfix:
                 pfx_obj_id, pfx_def_id, pfx_act_id, line = self.make_definition_ids(item)
-                lines += [line]
-                lines += [insert_actual_entry_template.format(pfx_act_id, item.position + 1)]
+                lines.append(line)
+                lines.append(insert_actual_entry_template.format(pfx_act_id, item.position + 1))
                 # preallocate names
                 self._var_name(f"r_ac_entry_id_{item.position + 1}")
 
-            lines += [
-                var_def_template.format(var_id, var_desc, var_act_id),
-            ]
-        
+            lines.append(var_def_template.format(var_id, var_desc, var_act_id))
+
         return lines
 
     def write_tblt_functions(self):
@@ -529,9 +581,9 @@ class Writer(AbstractWriter):
             ]
 
             for col in tblt.columns.items:
-                lines += [insert_column_template.format(col.type.lower(), col.position + 1, "'" + col.name + "'", col.position + 1)]
+                lines.append(insert_column_template.format(col.type.lower(), col.position + 1, "'" + col.name + "'", col.position + 1))
 
-            lines += [insert_def_template.format(tblt_id, tblt_desc, tblt_def_id)]
+            lines.append(insert_def_template.format(tblt_id, tblt_desc, tblt_def_id))
 
         return lines
 
@@ -592,7 +644,7 @@ class Writer(AbstractWriter):
         if aplist:
             formal_parmspec_template, fp_entry_template = self.create_insert_formal_parmspec_templates("parms for {}")
             num_ap = len(aplist)
-            lines += [formal_parmspec_template.format(num_ap, def_name, fp_spec_id, report_id)]
+            lines.append(formal_parmspec_template.format(num_ap, def_name, fp_spec_id, report_id))
 
             for ap_obj in aplist:
                 enum = ap_obj.position + 1
@@ -677,7 +729,7 @@ class Writer(AbstractWriter):
                 self._var_name(f"r_ac_rpt_entry_{item.position + 1}")
                 # Keeping this in a separate list because it has to happen
                 # after all of the calls to handle_report_fp_ap()
-                defn_lines += [insert_entry_template.format(item_id, item.position + 1)]
+                defn_lines.append(insert_entry_template.format(item_id, item.position + 1))
 
             lines += defn_lines
 
@@ -700,6 +752,37 @@ class Writer(AbstractWriter):
 
         return lines
 
+    def _emit_objects(self, lines, objects, coll, emit_object):
+        ''' Shared driver for the per-object stored procedures of a
+        collection.
+
+        Generates the SQL IDs of all objects up front, then for each object
+        adds its SP__insert_obj_metadata call and lets the caller add the
+        rest of its stored procedures.
+
+        :param lines: The lines array to add to.
+        :param objects: The objects to write the stored procedures for.
+        :param coll: The collection of the objects (cs.CTRL, cs.MACRO, etc.)
+        :param emit_object: Called as ``emit_object(obj, ids)`` for each
+            object, with `ids` the (object id, definition id, actual id)
+            tuple of the object.
+        :return: The `lines` array.
+        '''
+        # Split the template around its placeholders once, so each row is
+        # assembled without parsing a format string
+        obj_0, obj_1, obj_2 = self.create_insert_obj_metadata_template(coll).split("{}")
+
+        # Generate all of the object IDs ahead of the formatting loop
+        obj_ids = [self.make_sql_ids(self._make_ari(coll, obj)) for obj in objects]
+
+        add_line = lines.append
+        for obj, ids in zip(objects, obj_ids):
+            add_line("")
+            add_line(f"{obj_0}{obj.name}{obj_1}{ids[0]}{obj_2}")
+            emit_object(obj, ids)
+
+        return lines
+
     def write_ctrl_functions(self):
         ''' Genreate lines for all of the CTRLs in the ADM
         '''
@@ -709,33 +792,35 @@ class Writer(AbstractWriter):
             "-- CTRL",
         ]
 
-        insert_obj_template = self.create_insert_obj_metadata_template(cs.CTRL)
         insert_formal_parmspec_template,insert_entry_template = self.create_insert_formal_parmspec_templates("parms for the {} control")
 
         # Format with ctrl id, ctrl description, fp_spec_id or null, ctrl definition id
         insert_ctrl_formal_def_template = "CALL SP__insert_control_formal_definition({} , '{}', {}, {});"
-        for ctrl in self.adm.ctrl:
+
+        # Bind the per-object formatters once, outside of the loop
+        format_parmspec = insert_formal_parmspec_template.format
+        format_entry = insert_entry_template.format
+        format_def = insert_ctrl_formal_def_template.format
+
+        def emit_ctrl(ctrl, ids):
+            ctrl_id, ctrl_def_id, _ = ids
             ctrl_name = ctrl.name
             ctrl_desc = escape_description_sql(ctrl.description)
             parmspec = ctrl.parmspec.items if ctrl.parmspec else []
 
-            ctrl_id, ctrl_def_id, ctrl_act_id = self.make_sql_ids(self._make_ari(cs.CTRL, ctrl))
-            lines += [
-                "",
-                insert_obj_template.format(ctrl_name, ctrl_id),
-            ]
-
             if parmspec:
                 fp_spec_id = self._var_name("fp_spec_id")
-                lines += [insert_formal_parmspec_template.format(len(parmspec), ctrl_name, fp_spec_id, ctrl_id)]
-                for parm in parmspec:
-                    lines += [insert_entry_template.format(fp_spec_id, parm.position + 1, parm.name, parm.type)]
+                lines.append(format_parmspec(len(parmspec), ctrl_name, fp_spec_id, ctrl_id))
+                lines.extend([
+                    format_entry(fp_spec_id, parm.position + 1, parm.name, parm.type)
+                    for parm in parmspec
+                ])
             else:
                 fp_spec_id = "null"
 
-            lines += [insert_ctrl_formal_def_template.format(ctrl_id, ctrl_desc, fp_spec_id, ctrl_def_id)]
+            lines.append(format_def(ctrl_id, ctrl_desc, fp_spec_id, ctrl_def_id))
 
-        return lines
+        return self._emit_objects(lines, self.adm.ctrl, cs.CTRL, emit_ctrl)
 
     def write_gen_const_functions(self, objects, coll):
         ''' Helper function for the META and CONST objects to allow
@@ -746,45 +831,36 @@ class Writer(AbstractWriter):
         :param objects: list of objects (CONSTs or METAs) to write the stored procedures for
         :param coll: type of collection (cs.CONST or cs.META)
         '''
-        insert_obj_template = self.create_insert_obj_metadata_template(coll)
+        if not objects:
+            return []
 
         # Format with const id, definition, type, value, and const def id
         insert_const_actual_def_template = "CALL SP__insert_const_actual_definition({}, '{}', '{}', '{}', {});"
 
-        lines = []
-        for obj in objects:
-            c_name = obj.name
-            c_desc = escape_description_sql(obj.description)
+        # Split the template around its placeholders once, so each row is
+        # assembled without parsing a format string
+        def_0, def_1, def_2, def_3, def_4, def_5 = insert_const_actual_def_template.split("{}")
 
-            const_id, const_def_id, const_act_id = self.make_sql_ids(self._make_ari(coll, obj))
+        lines = []
 
-            lines += [
-                "",
-                insert_obj_template.format(c_name, const_id),
-                insert_const_actual_def_template.format(const_id, c_desc, obj.type, obj.value, const_act_id),
-            ]
+        def emit_const(obj, ids):
+            const_id, _, const_act_id = ids
+            c_desc = escape_description_sql(obj.description)
+            lines.append(
+                f"{def_0}{const_id}{def_1}{c_desc}{def_2}{obj.type}{def_3}{obj.value}{def_4}{const_act_id}{def_5}"
+            )
 
-        return lines
+        return self._emit_objects(lines, objects, coll, emit_const)
 
     def write_const_functions(self):
         ''' Genreate lines for all of the CONSTs in the ADM
         '''
-        lines = [
-            "",
-            "",
-            "-- CONST",
-        ]
-        return lines + self.write_gen_const_functions(self.adm.const, cs.CONST)
+        return [*_CONST_HEADER, *self.write_gen_const_functions(self.adm.const, cs.CONST)]
 
     def write_mdat_functions(self):
         ''' Genreate lines for all of the MDATs in the ADM
         '''
-        lines = [
-            "",
-            "",
-            "-- MDAT",
-        ]
-        return lines + self.write_gen_const_functions(self.adm.mdat, cs.META)
+        return [*_MDAT_HEADER, *self.write_gen_const_functions(self.adm.mdat, cs.META)]
 
 
     def write_mac_functions(self):
@@ -795,8 +871,10 @@ class Writer(AbstractWriter):
             "",
             "-- MAC",
         ]
+        # Avoid building templates (and declaring their variables) for no macros
+        if not self.adm.mac:
+            return lines
 
-        insert_obj_template = self.create_insert_obj_metadata_template(cs.MACRO)
         insert_formal_parmspec_template, insert_ac_formal_parmspec_entry_template = self.create_insert_formal_parmspec_templates("parms for the {} macro")
         insert_ac_id_template = self.create_insert_ac_id_template(cs.MACRO, "ac for {} macro")
 
@@ -806,45 +884,56 @@ class Writer(AbstractWriter):
         # Format with mac id, description, fp_spec_id, number of parmspec (?), and mac def id
         insert_mac_formal_def_template = "\nCALL SP__insert_macro_formal_definition({}, '{}', {}, {}, " + self._var_name("mac_ac_id") + ", {});"
 
-        for mac in self.adm.mac:
+        # Bind the per-object formatters once, outside of the loop
+        format_parmspec = insert_formal_parmspec_template.format
+        format_parmspec_entry = insert_ac_formal_parmspec_entry_template.format
+        format_ac_id = insert_ac_id_template.format
+        format_ac_entry = insert_ac_formal_entry_template.format
+        format_def = insert_mac_formal_def_template.format
+        # Same for the methods used per macro
+        var_name = self._var_name
+        make_definition_ids = self.make_definition_ids
+        add_line = lines.append
+
+        def emit_mac(mac, ids):
+            mac_id, mac_def_id, _ = ids
             mac_name = mac.name
             mac_desc = escape_description_sql(mac.description)
             parmspec = mac.parmspec.items if mac.parmspec else []
             num_parmspec = len(parmspec)
             definition = mac.action.items if mac.action else []
 
-            mac_id, mac_def_id, mac_act_id = self.make_sql_ids(self._make_ari(cs.MACRO, m))
-            lines += [
-                "",
-                insert_obj_template.format(mac_name, mac_id),
-            ]
-
             if parmspec:
-                fp_spec_id = self._var_name("fp_spec_id")
-                lines += [insert_formal_parmspec_template.format(len(parmspec), mac_name, fp_spec_id)]
-                for parm in parmspec:
-                    lines += [insert_ac_formal_parmspec_entry_template.format(fp_spec_id, parm.position + 1, parm.name, parm.type)]
-
-                lines += [insert_ac_id_template.format(num_parmspec, mac_name)]
+                fp_spec_id = var_name("fp_spec_id")
+                add_line(format_parmspec(num_parmspec, mac_name, fp_spec_id))
+                lines.extend([
+                    format_parmspec_entry(fp_spec_id, parm.position + 1, parm.name, parm.type)
+                    for parm in parmspec
+                ])
+            else:
+                fp_spec_id = "null"
 
+            # Every macro sets its own AC id, sized by its actions
+            add_line(format_ac_id(len(definition), mac_name))
             for item in definition:
-                def_id,_,_,_ = self.make_definition_ids(item)
-                lines += [insert_ac_formal_entry_template.format(def_id, item.position + 1)]
+                def_id,_,_,_ = make_definition_ids(item)
+                add_line(format_ac_entry(def_id, item.position + 1))
 
             #lines += [insert_mac_formal_def_template.format(mac_id, mac_desc, fp_spec_id, num_parmspec, mac_def_id)]
             # according to the comment in all_routines.sql,
             # num_parmspec at this line is p_max_call_depth int(10) unsigned - max call depth of the macro
             # however, we don't know how to specify that
             max_call_depth = 0
-            lines += [insert_mac_formal_def_template.format(mac_id, mac_desc, fp_spec_id, max_call_depth, mac_def_id)]
+            add_line(format_def(mac_id, mac_desc, fp_spec_id, max_call_depth, mac_def_id))
 
-        return lines
+        return self._emit_objects(lines, self.adm.mac, cs.MACRO, emit_mac)
 
     # If the setup.mysql file exists in the output dir, and this
     # file is not already sourced in the setup script, add it to
     # the file.
     # setup_path: full expected path to the setup script
     # rel_path: relative path of the new sql file to add (path from setup script)
+    @staticmethod
     def add_to_setup_mysql(setup_path, rel_path_sql):
         line_to_add = "source " + rel_path_sql +"\n"
 
@@ -857,17 +946,13 @@ class Writer(AbstractWriter):
 
         LOGGER.info("\tAttempting to add SQL file to " + setup_path + " ...",)
         try:
-            # If it doesn't find the line_to_add before the end_agent_comment, add the line
-            # right before the end_agent_comment
-            already_present = False
-            for line in fileinput.input(files=setup_path, inplace=True):
-                if line_to_add in line:
-                    already_present = True
-                if end_agent_comment in line and not already_present:
-                    print(line_to_add,)
-                print(line,)
-
-            if already_present:
+            # If it doesn't find the line_to_add, add the line
+            # right before the line holding the end_agent_comment
+            result = insert_line_before_anchor(setup_path, line_to_add, end_agent_comment)
+            if result == ANCHOR_MISSING:
+                LOGGER.warning("\n\t\tNo \"" + end_agent_comment + "\" line in setup.mysql, " + rel_path_sql + " not added.")
+                return
+            if result == LINE_PRESENT:
                 LOGGER.info("\n\t\t"+rel_path_sql + " already present in setup.mysql, skipping.")
             LOGGER.info("[ DONE ]")
 
@@ -879,6 +964,7 @@ class Writer(AbstractWriter):
     # already listed in the dockerfile, add it to the file.
     # dockerfile_path: full expected path to the dockerfile
     # rel_path_sql: relative path of the new sql file to add (path from the dockerfile)
+    @staticmethod
     def add_to_dockerfile(dockerfile_path, rel_path_sql):
         sqlfile_name = os.path.basename(rel_path_sql)
         line_to_add = "      - ${PWD}/"+rel_path_sql+":/docker-entrypoint-initdb.d/30-"+sqlfile_name+"\n"
@@ -892,17 +978,13 @@ class Writer(AbstractWriter):
 
         LOGGER.info("\tAttempting to add SQL file to " + dockerfile_path + " ...",)
         try:
-            # If it doesn't find the line_to_add before the end_agent_comment, add the line
-            # right before  the end_agent_comment
-            already_present = False
-            for line in fileinput.input(files=dockerfile_path, inplace=True):
-                if line_to_add in line:
-                    already_present = True
-                if end_agent_comment in line and not already_present:
-                    print(line_to_add, )
-                print(line,)
-
-            if already_present:
+            # If it doesn't find the line_to_add, add the line
+            # right before the line holding the end_agent_comment
+            result = insert_line_before_anchor(dockerfile_path, line_to_add, end_agent_comment)
+            if result == ANCHOR_MISSING:
+                LOGGER.warning("\n\t\tNo \"" + end_agent_comment + "\" line in dockerfile, " + rel_path_sql + " not added.")
+                return
+            if result == LINE_PRESENT:
                 LOGGER.info("\n\t\t"+rel_path_sql+" already present in dockerfile, skipping.")
             LOGGER.info("[ DONE ]")
 
@@ -22,8 +22,8 @@
 #
 
 import os
-import re
 import datetime
+import functools
 import ace.models
 from . import campsettings as cs
 from . import camputil as cu
@@ -51,16 +51,8 @@ def write_c_file_header(fd, filepath):
 def write_h_file_header(fd, filepath):
     _write_file_header(fd, filepath, "header")
 
-#
-# Writes the standard file header to the file
-#
-# fd: open file descriptor to write to
-# filepath: the path to the of the file, where the basename will be included
-# as part of the header
-# modifier: string indicating type of file this is ('c' or 'header' are common values)
-#
-def _write_file_header(fd, filepath, modifier):
-    standard_header = """\
+# Standard file header, formatted with the file name, date and file type
+_STANDARD_HEADER = """\
 /****************************************************************************
  **
  ** File Name: {0}
@@ -79,7 +71,18 @@ def _write_file_header(fd, filepath, modifier):
  ****************************************************************************/
 
 """
-    fd.write(standard_header.format(os.path.basename(filepath), str(datetime.datetime.now().date()), modifier))
+
+#
+# Writes the standard file header to the file
+#
+# fd: open file descriptor to write to
+# filepath: the path to the of the file, where the basename will be included
+# as part of the header
+# modifier: string indicating type of file this is ('c' or 'header' are common values)
+#
+def _write_file_header(fd, filepath, modifier):
+    # The date is looked up per file so a long-lived process never stamps a stale one
+    fd.write(_STANDARD_HEADER.format(os.path.basename(filepath), str(datetime.date.today()), modifier))
 
 
 
@@ -91,12 +94,10 @@ def _write_file_header(fd, filepath, modifier):
 # Returns the completed string.
 #
 def make_includes(files):
-    out = ""
-    for f in files:
-        out += "\n#include \"{}\"".format(f)
-    out += "\n\n"
+    out = [f"\n#include \"{f}\"" for f in files]
+    out.append("\n\n")
 
-    return out
+    return "".join(out)
 
 #
 # Returns a list of the .h files that need to be included for the 'uses'
@@ -105,10 +106,7 @@ def make_includes(files):
 # Returns a list of correctly-formatted files, to be passed to make_includes()
 #
 def get_uses_h_files(retriever):
-    uses = retriever.get_uses()
-    formatted_uses = [f.lower().replace("/", "_") for f in uses]
-    files = ["adm_{}.h".format(f) for f in formatted_uses]
-    return files
+    return [f"adm_{f.lower().replace('/', '_')}.h" for f in retriever.get_uses()]
 
 
 
@@ -122,25 +120,27 @@ def multiline_comment_format(tainted):
     comment_width = 100
 
     # replace any comment-ending characters with empty string
-    tainted = re.sub(r'\*/', '', tainted)
+    tainted = tainted.replace('*/', '')
 
     # replace newline with newline + comment character
-    tainted = re.sub('\\n', '\\n *', tainted)
+    tainted = tainted.replace('\n', '\n *')
 
     # split the lines every x characters to wrap
     tainted_list = tainted.splitlines()
     untainted = []
     for line in tainted_list:
-        while len(line) > comment_width:
-            left, right = line[:comment_width], line[comment_width:]
-            untainted.append("\n * " + left)
-            line = right
-        untainted.append("\n * " + line)
+        chunks = [line[i:i + comment_width] for i in range(0, len(line), comment_width)] or ['']
+        untainted.extend(["\n * " + chunk for chunk in chunks])
 
     # Add opening and closing comment characters
     untainted = ("/*" + "".join(untainted) + "\n */")
     return untainted
 
+# Width of the comment headers, not counting the `* +` and `+` ends
+_HEADER_WIDTH_SANS_ENDS = 93
+# This is the `* +---[...]---+` string that can be found at the beginning and end
+_ENVELOPE_STR = "\n * +" + ('-' * _HEADER_WIDTH_SANS_ENDS) + "+\n"
+
 #
 # Helper function to make and return a string for wide comment headers
 #
@@ -157,41 +157,37 @@ def multiline_comment_format(tainted):
 # ```
 # spaced to 112 characters-wide
 #
+@functools.lru_cache(maxsize=None)
 def make_formatted_comment_header(name, c_open, c_close):
-    width_sans_ends = 93
-
-    # This is the `* +---[...]---+` string that can be found at the beginning and end
-    envelope_str = "\n * +" + ('-' * width_sans_ends) + "+\n"
-
     name_len = len(name)
     # This is the `* |   name    +` string to be surrounded by envelope str
-    white_space  = (" " * int((width_sans_ends - len(name) ) / 2))
-
-    content_str  = " * |" + white_space + name + white_space
-    if(name_len % 2 == 0) :
-        content_str +=" "
-    content_str += "+"
-
+    white_space  = (" " * ((_HEADER_WIDTH_SANS_ENDS - name_len) >> 1))
 
-    out = envelope_str + content_str + envelope_str
+    # pad even-length names by one more space to keep the closing `+` aligned
+    end_str = " +" if name_len % 2 == 0 else "+"
 
+    parts = []
     if c_open :
-        out = "\n/*" + out
+        parts.append("\n/*")
+    parts.extend([_ENVELOPE_STR, " * |", white_space, name, white_space, end_str, _ENVELOPE_STR])
     if c_close:
-        out += " */\n"
-    return out
+        parts.append(" */\n")
+    return "".join(parts)
 
 
 
 ############################# FUNCTIONS SHARED BY IMPL_C and IMPL_H ###############################
 
+# The make_*_function helpers below take the lower-cased ADM namespace as
+# ns_lower, so that callers lower it once for all of the objects they name.
+
 #
 # Makes and returns the basename, fullname, and signature tuple for the edd
 # collect functions; where basename = edd_<edd-name> and fullname = <name>_<basename>
 #
-def make_collect_function(adm, edd):
+def make_collect_function(ns_lower, edd):
     basename = "get_{}".format(edd.name.lower())
-    fullname = "{0}_{1}".format(adm.norm_namespace.lower(), basename)
+    fullname = "{0}_{1}".format(ns_lower, basename)
     signature = "tnv_t *{}(tnvc_t *parms)".format(fullname)
     return basename, fullname, signature
 
@@ -199,10 +195,10 @@ def make_collect_function(adm, edd):
 # Makes and returns the basename, fullname, and signature tuple for the metadata
 # collect functions; where basename = <keyword>_<meta-name> and fullname = <name>_<basename>
 #
-def make_meta_function(adm, meta):
+def make_meta_function(ns_lower, meta):
     keyword = cs.get_sname(cs.META)
     basename = "{0}_{1}".format(keyword, meta.name.lower())
-    fullname = "{0}_{1}".format(adm.norm_namespace.lower(), basename)
+    fullname = "{0}_{1}".format(ns_lower, basename)
     signature = "tnv_t *{}(tnvc_t *parms)".format(fullname)
     return basename, fullname, signature
 
@@ -210,10 +206,10 @@ def make_meta_function(adm, meta):
 # Makes and returns the basename, fullname, and signature tuple for the constant
 # function; where basename = <keyword>_<const-name> and fullname = <name>_<basename>
 #
-def make_constant_function(adm, const):
+def make_constant_function(ns_lower, const):
     keyword = "get"
     basename = "{0}_{1}".format(keyword, const.name.lower())
-    fullname = "{0}_{1}".format(adm.norm_namespace.lower(), basename)
+    fullname = "{0}_{1}".format(ns_lower, basename)
     signature = "tnv_t *{}(tnvc_t *parms)".format(fullname)
     return basename, fullname, signature
 
@@ -221,10 +217,10 @@ def make_constant_function(adm, const):
 # Makes and returns the basename, fullname, and signature tuple for the control
 # functions; where basename = <keyword>_<control-name> and fullname = <name>_<basename>
 #
-def make_control_function(adm, control):
+def make_control_function(ns_lower, control):
     keyword = cs.get_sname(cs.CTRL)
     basename = "{0}_{1}".format(keyword, control.name.lower())
-    fullname = "{0}_{1}".format(adm.norm_namespace.lower(), basename)
+    fullname = "{0}_{1}".format(ns_lower, basename)
     signature = "tnv_t *{}(eid_t *def_mgr, tnvc_t *parms, int8_t *status)".format(fullname)
     return basename, fullname, signature
 
@@ -232,10 +228,10 @@ def make_control_function(adm, control):
 # Makes and returns the basename, fullname, and signature tuple for the operator
 # functions; where basename = <keyword>_<op-name> and fullname = <name>_<basename>
 #
-def make_operator_function(adm, op):
+def make_operator_function(ns_lower, op):
     keyword = cs.get_sname(cs.OP)
     basename = "{0}_{1}".format(keyword, op.name.lower())
-    fullname = "{0}_{1}".format(adm.norm_namespace.lower(), basename)
+    fullname = "{0}_{1}".format(ns_lower, basename)
     signature = "tnv_t *{}(vector_t *stack)".format(fullname)
     return basename, fullname, signature
 
@@ -243,10 +239,10 @@ def make_operator_function(adm, op):
 # Makes and returns the basename, fullname, and signature tuple for the table
 # functions; where basename = tbl_<tbl-name> and fullname = <name>_<basename>
 #
-def make_table_function(adm, tbl):
+def make_table_function(ns_lower, tbl):
     keyword = cs.get_sname(cs.TBLT)
     basename = "{0}_{1}".format(keyword, tbl.name.lower())
-    fullname = "{0}_{1}".format(adm.norm_namespace.lower(), basename)
+    fullname = "{0}_{1}".format(ns_lower, basename)
     signature = "tbl_t *{}(ari_t *id)".format(fullname)
     return basename, fullname, signature
 
@@ -262,6 +258,7 @@ def make_table_function(adm, tbl):
 # standalone is a boolean whether or not the call needs to stand alone. If False, the call should be used
 # as an argument to another function.
 #
+@functools.lru_cache(maxsize=None)
 def make_adm_build_ari_template(coll, g_var_idx, standalone):
     amp_type = cs.get_amp_type(coll)
     idx_type = cs.get_adm_idx(coll)
@@ -272,12 +269,22 @@ def make_adm_build_ari_template(coll, g_var_idx, standalone):
     return template
 
 #
-# Writes an init function to the passed c_file.
+# Splits a template made by make_adm_build_ari_template() around its {0} and
+# {1} fields, returning the (left, middle, right) literal parts. Callers
+# formatting the template for every object can then join the parts directly.
+#
+def split_adm_build_ari_template(template):
+    left, rest = template.split("{0}")
+    middle, right = rest.split("{1}")
+    return left, middle, right
+
+#
+# Makes and returns the string for an init function.
 # name is the name returned by a call to initialize_names,
 # coll is the collection to make the init function for. Can be None
 # body is the body of the function.
 #
-def write_formatted_init_function(c_file, name, coll, body):
+def make_formatted_init_function(name, coll, body):
     ttype = None
     if coll is not None:
         ttype = "_" + cs.get_sname(coll).replace("-","_")
@@ -291,7 +298,14 @@ def write_formatted_init_function(c_file, name, coll, body):
         "\n}}"
         "\n\n")
 
-    c_file.write(init_funct_string.format(name, ttype, body))
+    return init_funct_string.format(name, ttype, body)
+
+#
+# Writes an init function to the passed c_file.
+# Arguments are the same as for make_formatted_init_function()
+#
+def write_formatted_init_function(c_file, name, coll, body):
+    c_file.write(make_formatted_init_function(name, coll, body))
 
 #
 # Builds the new parm format
@@ -302,40 +316,10 @@ def _make_adm_build_ari_parm(adm, item, params):
     item_ari = cu.make_ari_name_from_str(item_ns, item_coll, item_name)
     item_g_var_idx = cu.get_g_var_idx(item_ns)
 
-    # These two variables only used if aps or fps present
-    # notice not replacing {0} yet; it's formatted later with len of aps or fps
-    ari_parm_template = "ADM_BUILD_ARI_PARM_{0}({1}, {2}[{3}], {4}"
-    ari_parm_str = ari_parm_template.format("{0}", cs.get_amp_type(item_coll), item_g_var_idx,
-                        cs.get_adm_idx(item_coll), item_ari)
-
-    #FIXME: propagate parameters
-    aps = []
-    fps = []
-    types = []
-
-    if aps:
-        ari_parm_str = ari_parm_str.format(len(aps))
-
-        for idx, a in enumerate(aps):
-            amp_type = cu.make_amp_type_name_from_str(types[idx])
-            pidx     = retriever.get_index_ap(a, params)
-            ari_parm_str += ", tnv_from_map({0}, {1})".format(amp_type, pidx)
-
-        return ari_parm_str + ")"
-
-    # formal params
-    elif fps:
-        ari_parm_str = ari_parm_str.format(len(fps))
-
-        for idx, f in enumerate(fps):
-            ftype = types[idx].lower()
-            ari_parm_str += ", tnv_from_{0}({1})".format(ftype, f)
-
-        return ari_parm_str + ")"
-
-    # no params
-    else:
-        return make_adm_build_ari_template(item_coll, item_g_var_idx, False).format("0", item_ari)
+    #FIXME: propagate actual/formal parameters as ADM_BUILD_ARI_PARM_<n>(...)
+    # once they are available from the item; until then the item is built
+    # without parameters
+    return make_adm_build_ari_template(item_coll, item_g_var_idx, False).format("0", item_ari)
 
 #
 # constructs and writes the init_macros function
@@ -345,39 +329,37 @@ def _make_adm_build_ari_parm(adm, item, params):
 # g_var_idx value in the calling function.
 #
 def write_init_macro_function(c_file, adm, g_var_idx, mgr):
-    body = ""
+    ns = adm.norm_namespace
+    parts = []
     meta_decl_str   = "\n\tmetadata_t *meta = NULL;\n"
     macdef_decl_str = "\n\tmacdef_t *def = NULL;\n"
     added_meta   = False
     added_macdef = False
 
-    macdef_create_template = "macdef_create({0}, {1});"
-    add_macdef_ctrl_str    = "\n\tadm_add_macdef_ctrl(def, {});"
     adm_add_macdef_str     = "\n\tadm_add_macdef(def);"
-    meta_add_parm_template = "\n\tmeta_add_parm(meta, \"{0}\", {1});"
 
-    enum_name = cu.make_enum_name_from_str(adm.norm_namespace)
-    meta_add_macro_template = "\n\tmeta = meta_add_macro" + "(def->ari, " + enum_name + ", \"{0}\", \"{1}\");"
-    build_ari_str_template  = make_adm_build_ari_template(cs.MACRO, g_var_idx, False)
+    enum_name = cu.make_enum_name_from_str(ns)
+    ari_left, ari_mid, ari_right = split_adm_build_ari_template(
+        make_adm_build_ari_template(cs.MACRO, g_var_idx, False))
 
     for obj in adm.mac:
         # Preliminaries
-        ari = cu.make_ari_name(adm.norm_namespace, cs.MACRO, obj)
+        ari = cu.make_ari_name(ns, cs.MACRO, obj)
         mac_name    = obj.name
         description = obj.description or ''
 
         acts  = obj.action.items if obj.action else []
         parms = obj.parmspec.items if obj.parmspec else []
 
-        defs_str = ""
+        defs_parts = []
         parms_tf = "0"
         if parms:
             parms_tf = "1"
 
         # Use templates to make calls specific to this macro
-        build_ari_str     = build_ari_str_template.format(parms_tf, ari)
-        macdef_create_str = macdef_create_template.format(len(defs), build_ari_str)
-        if defs:
+        build_ari_str     = f"{ari_left}{parms_tf}{ari_mid}{ari}{ari_right}"
+        macdef_create_str = f"macdef_create({len(acts)}, {build_ari_str});"
+        if acts:
             macdef_create_str = "\n\tdef = " + macdef_create_str
             added_macdef = True
         else:
@@ -387,29 +369,31 @@ def write_init_macro_function(c_file, adm, g_var_idx, mgr):
         # Create necessary strings for each definition
         for item in acts:
             def_build_ari_parm_str = _make_adm_build_ari_parm(adm, item, parms);
-            defs_str += add_macdef_ctrl_str.format(def_build_ari_parm_str)
+            defs_parts.append(f"\n\tadm_add_macdef_ctrl(def, {def_build_ari_parm_str});")
 
         # Add all the formatted strings to the body
-        body += "\n\n\t/* {} */".format(mac_name.upper())
-        body += macdef_create_str
-        body += defs_str
-        body += adm_add_macdef_str
+        parts.append(f"\n\n\t/* {mac_name.upper()} */")
+        parts.append(macdef_create_str)
+        parts.extend(defs_parts)
+        parts.append(adm_add_macdef_str)
 
         # Additional strings to be added if this the the manager code
         if mgr:
-            body += meta_add_macro_template.format(mac_name, description)
+            parts.append(f"\n\tmeta = meta_add_macro(def->ari, {enum_name}, \"{mac_name}\", \"{description}\");")
             added_meta = True
             for parm in parms:
                 amp_type = cu.make_amp_type_name_from_str(parm.type)
-                body += meta_add_parm_template.format(parm.name, amp_type)
+                parts.append(f"\n\tmeta_add_parm(meta, \"{parm.name}\", {amp_type});")
 
     # only add these declarations if the variables will be used; to avoid compiler warnings in C code
-    if added_macdef:
-        body = macdef_decl_str + body
+    decls = []
     if added_meta:
-        body = meta_decl_str + body
+        decls.append(meta_decl_str)
+    if added_macdef:
+        decls.append(macdef_decl_str)
+    body = "".join(decls + parts)
 
-    write_formatted_init_function(c_file, adm.norm_namespace, cs.MACRO, body)
+    write_formatted_init_function(c_file, ns, cs.MACRO, body)
 
 # Builds a template for the
 # ```
@@ -423,6 +407,7 @@ def write_init_macro_function(c_file, adm, g_var_idx, mgr):
 # collection. Only a subset of values that need to be substituted for_each_ item in the
 # collection, formatting ones related to coll and name here.
 #
+@functools.lru_cache(maxsize=None)
 def make_std_meta_add_coll_template(coll, name):
     enum_name = cu.make_enum_name_from_str(name)
     coll_name = 'cnst' if coll == cs.META else cs.get_sname(coll).lower()
@@ -436,31 +421,29 @@ def make_std_meta_add_coll_template(coll, name):
 # TODO: cur_ari in generated function is unused
 #
 def write_init_var_function(c_file, adm, g_var_idx, mgr):
-    body = ""
+    ns = adm.norm_namespace
+    parts = []
     coll_decl_str = "\n\tari_t *id = NULL;\n"
     expr_decl_str = "\n\texpr_t *expr = NULL;\n"
 
-    expr_create_str   = "\n\texpr = expr_create({});"
-    expr_add_str      = "\n\texpr_add_item(expr, {});"
-    add_var_from_expr = "\n\tadm_add_var_from_expr(id, {}, expr);"
-
     # gives you the adm_build_ari(...)
-    build_str_template = "\n" + make_adm_build_ari_template(cs.VAR, g_var_idx, True)
+    build_left, build_mid, build_right = split_adm_build_ari_template(
+        "\n" + make_adm_build_ari_template(cs.VAR, g_var_idx, True))
     # gives you the meta_add_var(... )
-    meta_add_template = make_std_meta_add_coll_template(cs.VAR, adm.norm_namespace)
+    meta_add_template = make_std_meta_add_coll_template(cs.VAR, ns)
 
     added_coll = False
     added_expr = False
 
     for obj in adm.var:
         # Preliminaries
-        ari      = cu.make_ari_name(adm.norm_namespace, cs.VAR, obj)
+        ari      = cu.make_ari_name(ns, cs.VAR, obj)
         amp_type = cu.make_amp_type_name_from_str(obj.type)
 
         var_name    = obj.name
         description = obj.description or ''
 
-        expr_str = ""
+        expr_parts = []
 
         # Add to the expr str for each postfix
         pfxs = obj.initializer.postfix.items if obj.initializer else []
@@ -473,36 +456,38 @@ def write_init_var_function(c_file, adm, g_var_idx, mgr):
 
             pfx_build_ari = make_adm_build_ari_template(pfx_coll, pfx_g_var_idx, False).format(param_flag, pfx_ari)
 
-            expr_str += expr_add_str.format(pfx_build_ari)
+            expr_parts.append(f"\n\texpr_add_item(expr, {pfx_build_ari});")
+
+        # Add formatted strings to body
+        parts.append(f"\n\n\t/* {var_name.upper()} */")
+        parts.append(f"{build_left}0{build_mid}{ari}{build_right}")
 
-        # If postfixs are present, append the expr_create string, and prepend
-        # the adm_add_var_from_expr stringq
+        # If postfixs are present, wrap the expr items in the expr_create
+        # and adm_add_var_from_expr strings
         if pfxs:
             init_type = cu.make_amp_type_name_from_str(obj.initializer.type)
 
-            expr_str = expr_create_str.format(init_type) + expr_str
-            expr_str += add_var_from_expr.format(init_type)
+            parts.append(f"\n\texpr = expr_create({init_type});")
+            parts.extend(expr_parts)
+            parts.append(f"\n\tadm_add_var_from_expr(id, {init_type}, expr);")
 
             added_expr = True
 
-        # Add formatted strings to body
-        body += "\n\n\t/* {} */".format(var_name.upper())
-        body +=  build_str_template.format("0", ari)
-        body += expr_str
-
         # Additional meta_add function needs to be called if this is the mgr code generation
         if mgr:
-            body += "\n\t" + meta_add_template.format(amp_type, var_name, description)
+            parts.append("\n\t" + meta_add_template.format(amp_type, var_name, description))
 
         added_coll = True
 
     # only add these declarations if the variables will be used; to avoid compiler warnings
-    if added_expr:
-        body = expr_decl_str + body
+    decls = []
     if added_coll:
-        body = coll_decl_str + body
+        decls.append(coll_decl_str)
+    if added_expr:
+        decls.append(expr_decl_str)
+    body = "".join(decls + parts)
 
-    write_formatted_init_function(c_file, adm.norm_namespace, cs.VAR, body)
+    write_formatted_init_function(c_file, ns, cs.VAR, body)
 
 
 #
@@ -514,38 +499,36 @@ def write_init_var_function(c_file, adm, g_var_idx, mgr):
 # function for every report if == True
 #
 def write_parameterized_init_reports_function(c_file, adm, g_var_idx, mgr):
-    body = ""
+    ns = adm.norm_namespace
+    parts = []
     rpt_decl_str  = "\n\trpttpl_t *def = NULL;\n"
     meta_decl_str =	"\n\tmetadata_t *meta = NULL;\n"
     added_rpt  = False
     added_meta = False
 
-    rpt_create_template = "rpttpl_create_id({});"
-    build_ari_str_template = make_adm_build_ari_template(cs.RPTT, g_var_idx, False)
+    ari_left, ari_mid, ari_right = split_adm_build_ari_template(
+        make_adm_build_ari_template(cs.RPTT, g_var_idx, False))
 
-    add_item_template = "\n\trpttpl_add_item(def, {});"
     adm_add_str       = "\n\tadm_add_rpttpl(def);"
 
-    enum_name = cu.make_enum_name_from_str(adm.norm_namespace)
-    meta_add_rpt_template  = "meta_add_rpttpl(def->id, " + enum_name + ", \"{0}\", \"{1}\");"
-    meta_add_parm_template = "\n\tmeta_add_parm(meta, \"{0}\", {1});"
+    enum_name = cu.make_enum_name_from_str(ns)
 
     for obj in adm.rptt:
         # Preliminaries
         rpt_name    = obj.name
         description = obj.description or ''
 
-        ari    = cu.make_ari_name(adm.norm_namespace, cs.RPTT, obj)
+        ari    = cu.make_ari_name(ns, cs.RPTT, obj)
         params = obj.parmspec.items if obj.parmspec else []
         defs   = obj.definition.items if obj.definition else []
 
-        defs_str  = ""
+        defs_parts = []
         params_tf = "0"
         if params:
             params_tf = "1"
 
         # The rpt_create template is slightly different depending on presence of defs
-        rpt_create_str = rpt_create_template.format(build_ari_str_template.format(params_tf, ari))
+        rpt_create_str = f"rpttpl_create_id({ari_left}{params_tf}{ari_mid}{ari}{ari_right});"
         if defs:
             rpt_create_str = "\n\tdef = " + rpt_create_str
             added_rpt = True
@@ -555,99 +538,93 @@ def write_parameterized_init_reports_function(c_file, adm, g_var_idx, mgr):
         # Add to the defs string for each definition found
         for item in defs:
             def_build_ari_str = _make_adm_build_ari_parm(adm, item, params)
-            defs_str += add_item_template.format(def_build_ari_str)
+            defs_parts.append(f"\n\trpttpl_add_item(def, {def_build_ari_str});")
 
         # Add all formatted strings to the body
-        body += "\n\t/* {} */".format(obj.name.upper())
-        body += rpt_create_str
-        body += defs_str
-        body += adm_add_str
+        parts.append(f"\n\t/* {rpt_name.upper()} */")
+        parts.append(rpt_create_str)
+        parts.extend(defs_parts)
+        parts.append(adm_add_str)
 
         added_rpt = True
 
         # If this is the mgr code generation, need meta_add_rpt strings also
         if mgr:
-            meta_add_rpt_str = meta_add_rpt_template.format(rpt_name, description)
+            meta_add_rpt_str = f"meta_add_rpttpl(def->id, {enum_name}, \"{rpt_name}\", \"{description}\");"
 
-            meta_add_parm_str = ""
             if params:
                 meta_add_rpt_str = "meta = " + meta_add_rpt_str
                 added_meta = True
 
-            # Create meta_add_parm string for each parameter found
+            # Add to body string, with a meta_add_parm string for each parameter found
+            parts.append("\n\t" + meta_add_rpt_str)
             for parm in params:
                 amp_type = cu.make_amp_type_name_from_str(parm.type)
-                meta_add_parm_str += meta_add_parm_template.format(parm.name, amp_type)
-
-            # Add to body string
-            body += "\n\t" + meta_add_rpt_str + meta_add_parm_str
+                parts.append(f"\n\tmeta_add_parm(meta, \"{parm.name}\", {amp_type});")
 
     # only declare variables if they're going to be used
-    if added_rpt:
-        body = rpt_decl_str + body
+    decls = []
     if added_meta:
-        body = meta_decl_str + body
+        decls.append(meta_decl_str)
+    if added_rpt:
+        decls.append(rpt_decl_str)
+    body = "".join(decls + parts)
 
-    write_formatted_init_function(c_file, adm.norm_namespace, cs.RPTT, body)
+    write_formatted_init_function(c_file, ns, cs.RPTT, body)
 
 #
 # Writes the init_tables funtion for the passed adm name and
 # retriever class instance.
 #
 def write_init_tables_function(c_file, adm, g_var_idx, mgr):
-    body = ""
+    ns = adm.norm_namespace
+    parts = []
     tbl_decl_str        = "\n\ttblt_t *def = NULL;"
-    tbl_create_template = "\n\tdef = tblt_create({0}, {1});"
 
-    build_ari_template = make_adm_build_ari_template(cs.TBLT, g_var_idx, False)
-    enum_name = cu.make_enum_name_from_str(adm.norm_namespace)
+    ari_left, ari_mid, ari_right = split_adm_build_ari_template(
+        make_adm_build_ari_template(cs.TBLT, g_var_idx, False))
+    enum_name = cu.make_enum_name_from_str(ns)
 
     add_tblt_str      = "\n\tadm_add_tblt(def);"
-    meta_add_template = "\n\tmeta_add_tblt(def->id, " + enum_name + ", \"{0}\", \"{1}\");"
-    add_col_template  = "\n\ttblt_add_col(def, {0}, \"{1}\");"
 
     added_table = False
 
     for obj in adm.tblt:
         # Preliminaries
-        ari = cu.make_ari_name(adm.norm_namespace, cs.TBLT, obj)
+        ari = cu.make_ari_name(ns, cs.TBLT, obj)
         tbl_name    = obj.name
         description = obj.description or ''
 
         cols = obj.columns.items if obj.columns else []
-        cols_str = ""
 
         # Format the templates needed for the tables function
-        tbl_build_ari_str = build_ari_template.format("0", ari)
+        tbl_build_ari_str = f"{ari_left}0{ari_mid}{ari}{ari_right}"
 
         # The appearance of this template depends on whether this is the mgr code or not
-        if mgr:
-            tbl_create_str = tbl_create_template.format(tbl_build_ari_str, "NULL")
-        else:
-            tbl_create_str = tbl_create_template.format(tbl_build_ari_str, ari.lower())
+        tbl_collect = "NULL" if mgr else ari.lower()
+        tbl_create_str = f"\n\tdef = tblt_create({tbl_build_ari_str}, {tbl_collect});"
 
-        # Add to the cols string for each column present
+        # Add formatted strings to the body, with a col string for each column present
+        parts.append(f"\n\n\t/* {tbl_name.upper()} */\n")
+        parts.append(tbl_create_str)
         for col in cols:
             c_amp_type = cu.make_amp_type_name_from_str(col.type)
-            cols_str += add_col_template.format(c_amp_type, col.name)
-
-        # Add formatted strings to the body
-        body += "\n\n\t/* {} */\n".format(tbl_name.upper())
-        body += tbl_create_str
-        body += cols_str
-        body += add_tblt_str
+            parts.append(f"\n\ttblt_add_col(def, {c_amp_type}, \"{col.name}\");")
+        parts.append(add_tblt_str)
 
         added_table = True
 
         # If this the the mgr code generation, also need to call meta_add function
         if mgr:
-            body += meta_add_template.format(tbl_name, description)
+            parts.append(f"\n\tmeta_add_tblt(def->id, {enum_name}, \"{tbl_name}\", \"{description}\");")
 
     # tbl variable is only declared if needed; in order to avoid C compiler warnings for unused variable
+    decls = []
     if added_table:
-        body = tbl_decl_str + body
+        decls.append(tbl_decl_str)
+    body = "".join(decls + parts)
 
-    write_formatted_init_function(c_file, adm.norm_namespace, cs.TBLT, body)
+    write_formatted_init_function(c_file, ns, cs.TBLT, body)
 
 #
 # Writes the init function to c_file
@@ -661,36 +638,37 @@ def write_init_function(c_file, adm: ace.models.AdmFile, g_var_idx: str, mgr: bo
     init_call_template = "\n\t" + adm.norm_namespace + "_init_{0}();"
 
     # order of init functions matters
-    obj_types = {
-        cs.META: 'mdat',
-        cs.CONST: 'const',
-        cs.EDD: 'edd',
-        cs.OP: 'oper',
-        cs.VAR: 'var',
-        cs.CTRL: 'ctrl',
-        cs.MACRO: 'mac',
-        cs.RPTT: 'rptt',
-        cs.TBLT: 'tblt',
-    }
+    obj_types = (
+        (cs.META, 'mdat'),
+        (cs.CONST, 'const'),
+        (cs.EDD, 'edd'),
+        (cs.OP, 'oper'),
+        (cs.VAR, 'var'),
+        (cs.CTRL, 'ctrl'),
+        (cs.MACRO, 'mac'),
+        (cs.RPTT, 'rptt'),
+        (cs.TBLT, 'tblt'),
+    )
 
     init_decls = ""
     init_calls = ""
     if not mgr:
         init_calls = "\n\t" + adm.norm_namespace + "_setup();"
 
-    for coll, attrname in obj_types.items():
-        init_decls += init_decl_template.format(cs.get_sname(coll).lower())
+    for coll, attrname in obj_types:
+        sname = cs.get_sname(coll).lower()
+        init_decls += init_decl_template.format(sname)
 
         # only generate NN's for elements that appear in the ADM
         if getattr(adm, attrname):
             vdb_adds += vdb_add_template.format(cs.get_adm_idx(coll), g_var_idx)
 
-        init_calls += init_call_template.format(cs.get_sname(coll).lower())
+        init_calls += init_call_template.format(sname)
 
     body = vdb_adds + "\n\n" + init_calls
 
-    c_file.write(init_decls + "\n")
-    write_formatted_init_function(c_file, adm.norm_namespace, None, body)
+    # declarations and function together in one write
+    c_file.write(init_decls + "\n" + make_formatted_init_function(adm.norm_namespace, None, body))
 
 def make_cplusplus_open():
     ''' Open an "extern C" block for C++ inclusion. '''
@@ -20,91 +20,122 @@
 # subcontract 1658085.
 #
 
-import re
+import pathlib
+from collections import defaultdict
+
+# Start and end markers of the custom sections
+_INCL_START = "/*   START CUSTOM INCLUDES HERE  */"
+_INCL_END = "/*   STOP CUSTOM INCLUDES HERE  */"
+_FUNC_START = "/*   START CUSTOM FUNCTIONS HERE */"
+_FUNC_END = "/*   STOP CUSTOM FUNCTIONS HERE  */"
+_TYPEENUM_START = "/*   START typeENUM */"
+_TYPEENUM_END = "/*   STOP typeENUM  */"
+
+# Indicator line and start/end markers surrounding the custom function bodies
+# of a C file
+_CUSTOM_BODY_INDICATOR = "* +-------------------------------------------------------------------------+"
+_CUSTOM_BODY_MARKER = '|{} CUSTOM FUNCTION {} BODY'
+# Text common to the start and end markers, for quickly skipping other lines
+_CUSTOM_FUNCTION_TAG = "CUSTOM FUNCTION"
+# Text found in every marker except the typeENUM ones, so a file without it
+# (or the typeENUM text) has no custom content to scan for
+_CUSTOM_TAG = "CUSTOM"
+_TYPEENUM_TAG = "typeENUM"
+# Full comment block around a custom body, formatted with START or STOP and the function name
+_CUSTOM_BODY_MARKER_BLOCK = (
+	"\t/*\n"
+	"\t " + _CUSTOM_BODY_INDICATOR + "\n"
+	"\t * " + _CUSTOM_BODY_MARKER + "\n"
+	"\t " + _CUSTOM_BODY_INDICATOR + "\n"
+	"\t */\n")
+# Literal pieces of the stripped start and end marker lines, around the function name
+_CUSTOM_BODY_START_PREFIX = "* |START CUSTOM FUNCTION "
+_CUSTOM_BODY_STOP_PREFIX = "* |STOP CUSTOM FUNCTION "
+_CUSTOM_BODY_SUFFIX = " BODY"
+
 
 #
-# Class to handle scraping files, and writing custom tags and code to
-# newly-generated files.
+# Returns the lines of a file's text, each keeping its newline as readlines()
+# would. Only newlines split lines here; splitlines() would also split on
+# form feeds and other separators found in C sources.
 #
-class Scraper(object):
-	
-	################## HELPER FUNCTIONS TO MAKE \CUSTOM\ TAGS FOR FILE #############
+def _split_lines(text):
+	lines = text.split("\n")
+	last = lines.pop()
+	lines = [line + "\n" for line in lines]
+	if last:
+		lines.append(last)
+	return lines
 
-	#
-	# Returns a tuple of the custom includes start and end markers
-	#
-	def _make_custom_includes_markers(self):
-		return "/*   START CUSTOM INCLUDES HERE  */", "/*   STOP CUSTOM INCLUDES HERE  */"
+#
+# Returns the function name from a stripped line containing a custom body
+# start marker, or None if the line has no such marker. The name runs from
+# the marker prefix up to the last " BODY" on the line.
+#
+def _get_custom_body_start_name(clean_line):
+	start = clean_line.find(_CUSTOM_BODY_START_PREFIX)
+	if start < 0:
+		return None
+	start += len(_CUSTOM_BODY_START_PREFIX)
+	end = clean_line.rfind(_CUSTOM_BODY_SUFFIX)
+	if end <= start:
+		return None
+	return clean_line[start:end]
 
-	#
-	# Returns a tuple of the custom functions start and end markers
-	#
-	def _make_custom_functions_markers(self):
-		return "/*   START CUSTOM FUNCTIONS HERE */", "/*   STOP CUSTOM FUNCTIONS HERE  */"
+#
+# Returns True if a stripped line begins with a custom body end marker for
+# any (non-empty) function name.
+#
+def _is_custom_body_end(clean_line):
+	return (clean_line.startswith(_CUSTOM_BODY_STOP_PREFIX)
+		and clean_line.find(_CUSTOM_BODY_SUFFIX, len(_CUSTOM_BODY_STOP_PREFIX) + 1) >= 0)
 
 
+#
+# Class to handle scraping files, and writing custom tags and code to
+# newly-generated files.
+#
+class Scraper(object):
+
 	######## HELPER FUNCTIONS FOR PARSING INTERNAL DATA STRUCT FOR CUSTOM CODE ##########
 
 	
 	#
-	# Pops items off of the passed queue (list) structure, searching
-	# for the custom includes tags. Returns all lines encompassed in these tags
+	# Advances the passed iterator over a file's lines, in file order, to the
+	# line after the start marker, then collects lines until the end marker.
+	# Returns all lines encompassed in these markers.
 	#
-	# lines: lines to search
-	# Returns: (list, list) tuple that is 1) list of strings from between the custom
-	# includes tags and 2) updated 'lines' queue (evaluated lines are popped off)
+	# lines: iterator over the lines to search; it is left positioned after
+	# the end marker, so that consecutive sections are found in a single pass
+	# start, end: the start and end marker strings
 	#
-	# NOTICE: since this is treating lines as a queue, it will evaluate lines in
-	# reverse order (popping off the end of the list).
-	#	
-	def _find_custom_includes_in_queue(self, lines):
-		includes = []
-		line = ""
-		
-		start, end = self._make_custom_includes_markers()
-		
-		# find the start
-		while (len(lines) != 0 and line.strip() != start):
-			line = lines.pop()
+	def _find_custom_section(self, lines, start, end):
+		section = []
+
+		# find the start; the substring test avoids stripping every line
+		for line in lines:
+			if(start in line and line.strip() == start):
+				break
 
 		# Append until we find the end
-		while(len(lines) != 0):
-			line = lines.pop()
-			if(line.strip() == end):
+		for line in lines:
+			if(end in line and line.strip() == end):
 				break
-			includes.append(line)
-		
-		return includes, lines	
+			section.append(line)
+
+		return section
 
 	#
-	# Pops items off of the passed queue (list) structure, searching
-	# for the custom functions tags. Returns all lines encompassed in these tags
-	#
-	# lines: lines to search
-	# Returns: (list, list) tuple that is 1) list of strings from between the custom
-	# function tags and 2) updated 'lines' queue (evaluated lines are popped off)
-	#
-	# NOTICE: since this is treating lines as a queue, it will evaluate lines in
-	# reverse order (popping off the end of the list).
+	# Scans the passed lines once, in file order, for the custom sections
+	# marked by each of the passed (start, end) marker tuples, expected in
+	# that order in the file.
+	# Returns a list with the lines found for each section, and the iterator
+	# over the lines following the last section.
 	#
-	def _find_custom_functions_in_queue(self, lines):
-		custom_func = []
-		line = ""
-
-		start, end = self._make_custom_functions_markers()
-	
-		# find the start
-		while (len(lines) != 0 and line.strip() != start):
-			line = lines.pop()
-
-		# Append until we find the end
-		while(len(lines) != 0):
-			line = lines.pop()
-			if(line.strip() == end):
-				break
-			custom_func.append(line)
-		
-		return custom_func, lines
+	def _find_custom_sections(self, lines, markers):
+		lines = iter(lines)
+		sections = [self._find_custom_section(lines, start, end) for start, end in markers]
+		return sections, lines
 
 	
 	############ FUNCTIONS TO WRITE SCRAPED CUSTOM CODE TO FILE, WITH SURROUNDING TAGS ###########
@@ -117,12 +148,7 @@ class Scraper(object):
 	# if custom is empty, will just write the tags to the file
 	#
 	def write_custom_includes(self, file):
-		start, end = self._make_custom_includes_markers()
-	
-		file.write(start + "\n")
-		for line in self.includes:
-			file.write(line);
-		file.write(end + "\n\n")
+		file.write("".join([_INCL_START, "\n", *self.includes, _INCL_END, "\n\n"]))
 	
 	#
 	# Write the standard 'CUSTOM' tag for custom functions
@@ -133,12 +159,7 @@ class Scraper(object):
 	# if custom is empty, will just write the tags for custom content to the file
 	#
 	def write_custom_functions(self, file):
-		start, end = self._make_custom_functions_markers()
-	
-		file.write(start + "\n")
-		for line in self.functions:
-			file.write(line)
-		file.write(end + "\n\n")
+		file.write("".join([_FUNC_START, "\n", *self.functions, _FUNC_END, "\n\n"]))
 
 	
 ####################### CHILD CLASSES FOR H- or C-files ############################
@@ -148,95 +169,64 @@ class Scraper(object):
 #
 class C_Scraper(Scraper):
 	#
-	# Helper function that returns the indicator and custom tag used by the custom bodies.
-	# TODO: This is split out differently than the others and is not ideal because of how 
-	# the scraper deals with multi-line tags. Try to simplify.
-	#
-	def _get_custom_body_pieces(self):
-		indicator = "* +-------------------------------------------------------------------------+"
-		marker  = '|{} CUSTOM FUNCTION {} BODY'
-		return indicator, marker
-
-	#
-	# Returns a tuple of the (indicator, start marker, end marker) strings for use with a
-	# regex search for custom function bodies. 
-	#
-	def _get_custom_body_re_markers(self):
-		indicator, marker = self._get_custom_body_pieces()
-		
-		marker = '\* \\' + marker
-		function_string_matcher = '(.+)'
-	
-		return indicator, marker.format('START', function_string_matcher), marker.format('STOP', function_string_matcher)
-	
-	#
-	# Pops items off of the passed queue (list) structure, searching
-	# for the function custom body tags. Returns all dictonary of key:value pairs for
-	# lines encompassed in these tags, where the key is the function name, and value
-	# is the list of custom lines for that function
-	# This exhausts the entire passed queue, so unlike the other find*_custom_*() functions,
-	# it does not return a list of remaining lines in the queue
+	# Searches the passed lines, in file order, for the function custom body
+	# tags. Returns a dictonary of key:value pairs for lines encompassed in
+	# these tags, where the key is the function name, and value is the list
+	# of custom lines for that function
+	# This exhausts the passed iterator.
 	#
-	# lines: lines to search
+	# lines: iterator over the lines to search
 	#
-	# NOTICE: since this is treating lines as a queue, it will evaluate lines in
-	# reverse order (popping off the end of the list).
-	#
-	def _find_func_custom_body_in_queue(self, lines):
-		func_bods = {}
+	def _find_func_custom_body(self, lines):
+		func_bods = defaultdict(list)
 		func = None
+		# Lines of the body being read
+		body = None
+		# The latest body line is held back until the next line shows whether
+		# it opens the end marker comment, which is not part of the body
+		pending = None
 
-		indicator, start_re, end_re = self._get_custom_body_re_markers()
-
-		# While lines remain in the queue, pop one off and evaluate it
-		while len(lines) != 0:
-			line = lines.pop()
-			clean_line = line.strip()
+		indicator = _CUSTOM_BODY_INDICATOR
 
+		# Only lines containing a marker are stripped and compared; the
+		# substring tests leave ordinary source lines untouched
+		for line in lines:
 			# If we're inside one of the custom function bodies
 			# keep appending until end
 			if(func is not None):
 
 				# Append to this function's dictionary entry until you reach
 				# another indicator with an end tag
-				if(clean_line == indicator):
-					line = lines.pop()
-					clean_line = line.strip()
+				if(indicator in line and line.strip() == indicator):
+					line = next(lines, "")
 				
-					if(re.match(end_re, clean_line) != None):
-						func_bods[func].pop()
+					if(_is_custom_body_end(line.strip())):
 						func = None
-					else:		
-						continue			
+					elif(pending is not None):
+						body.append(pending)
+					pending = None
 				else:
-					if(not func in func_bods):
-						func_bods[func] = []
-					func_bods[func].append(line)
+					if(pending is not None):
+						body.append(pending)
+					else:
+						body = func_bods[func]
+					pending = line
 				
 			# Check if this line is the start of a new custom function body
-			else:
-				s = re.search(start_re, clean_line)
-				if s != None:
-					func = s.group(1)
+			elif(_CUSTOM_FUNCTION_TAG in line):
+				func = _get_custom_body_start_name(line.strip())
 
-		return func_bods		
+		# A body left open at the end of the file keeps all of its lines
+		if(pending is not None):
+			body.append(pending)
+
+		return dict(func_bods)		
 
 	#
 	# Returns a tuple of the custom body's start and end markers
 	#
 	def _make_custom_body_markers(self, function):
-		indicator, marker = self._get_custom_body_pieces()
-
-		template = ("\t/*\n"
-			    "\t {0}\n"
-			    "\t * {1}\n"
-			    "\t {0}\n"
-			    "\t */\n")
-
-		start_marker = marker.format("START", function)
-		end_marker = marker.format("STOP", function)
-
-		return template.format(indicator, start_marker), template.format(indicator, end_marker)
+		return _CUSTOM_BODY_MARKER_BLOCK.format("START", function), _CUSTOM_BODY_MARKER_BLOCK.format("STOP", function)
 
 		
 	#
@@ -251,10 +241,7 @@ class C_Scraper(Scraper):
 		custom = self.func_bods.get(function, [])
 		start, end = self._make_custom_body_markers(function)
 		
-		file.write(start)
-		for line in custom:
-			file.write(line)
-		file.write(end)
+		file.write("".join([start, *custom, end]))
 
 		
 	#
@@ -275,20 +262,25 @@ class C_Scraper(Scraper):
 		
 		print("Scraping ", self.filename, " ... ",)
 
-		c = []
-		# Insert each line into a queue
-		# NOTE: this results in the first line of the file being last in c
-		# (find_* functions appropriately pop off the end of c).
+		c = ""
+		# Read the whole file in one call
 		try:
-			for line in open(self.filename).readlines(): 
-				c.insert(0,line)
+			c = pathlib.Path(self.filename).read_text()
 		except IOError as e:
 			print("[ Error ] Failed to open ", self.filename, " for scraping.")
 			print(e)
 
-		self.includes,  c = self._find_custom_includes_in_queue(c)
-		self.functions, c = self._find_custom_functions_in_queue(c)
-		self.func_bods    = self._find_func_custom_body_in_queue(c)
+		if(_CUSTOM_TAG in c):
+			# Find all custom content in one pass over the lines, in file order
+			(self.includes, self.functions), rest = self._find_custom_sections(_split_lines(c), [
+				(_INCL_START, _INCL_END),
+				(_FUNC_START, _FUNC_END),
+			])
+			self.func_bods = self._find_func_custom_body(rest)
+		else:
+			# No markers at all, so skip the line scans
+			self.includes = []
+			self.functions = []
 
 		print("\t[ DONE ]")
 		
@@ -302,52 +294,11 @@ class C_Scraper(Scraper):
 #
 class H_Scraper(Scraper):
 	#
-	# Returns a tuple of the custom type_enum start and end markers
-	#
-	def _make_custom_type_enum_markers(self):
-		return "/*   START typeENUM */", "/*   STOP typeENUM  */"
-
-	#
-	# Pops items off of the passed queue (list) structure, searching
-	# for the type_enum tag. Returns all lines encompassed in these tags
-	# lines: lines to search
-	# Returns: (list, list) tuple that is 1) list of strings from between the custom
-	# function tags and 2) updated 'lines' queue (evaluated lines are popped off)
-	#
-	# NOTICE: since this is treating lines as a queue, it will evaluate lines in
-	# reverse order (popping off the end of the list).
-	#
-	def _find_type_enums_in_queue(self, lines):
-		enums = []
-		line = ""
-		
-		start, end = self._make_custom_type_enum_markers()
-			
-		# find the start
-		while (len(lines) != 0 and line.strip() != start):
-			line = lines.pop()
-			
-		# Append until we find the end
-		while(len(lines) != 0):
-			line = lines.pop()
-			
-			if(line.strip() == end):
-				break
-			enums.append(line)
-			
-		return enums, lines
-
-	
 	# Writes the type enum tags and if scraping was required any 
 	# typeENUMS that were found
 	#
 	def write_custom_type_enums(self, file):
-		start, end = self._make_custom_type_enum_markers()
-	
-		file.write(start + "\n")
-		for line in self.type_enums:
-			file.write(line)
-		file.write(end + "\n\n")
+		file.write("".join([_TYPEENUM_START, "\n", *self.type_enums, _TYPEENUM_END, "\n\n"]))
 
 	#
 	# Constructor for the H_Scraper class
@@ -358,26 +309,32 @@ class H_Scraper(Scraper):
 		self.functions  = ["/*             TODO              */\n"]
 		self.type_enums = ["/*             TODO              */\n"]
 
-		h = []
+		h = ""
 
 		if self.filename is None:
 			return
 
 		print("Scraping ", self.filename, " ... ",)
 
-		# Insert each line into a queue
-		# NOTE: this results in the first line of the file being last in h
-		# (find_* functions appropriately pop off the end of h).
+		# Read the whole file in one call
 		try:
-			for line in open(self.filename).readlines(): 
-				h.insert(0,line)
+			h = pathlib.Path(self.filename).read_text()
 		except IOError as e:
-			print("[ Error ] Failed to open ", fd, " for scraping.")
+			print("[ Error ] Failed to open ", self.filename, " for scraping.")
 			print(e)
 			
-		self.includes,    h = self._find_custom_includes_in_queue(h)
-		self.type_enums,  h = self._find_type_enums_in_queue(h)
-		self.functions, h = self._find_custom_functions_in_queue(h)
+		if(_CUSTOM_TAG in h or _TYPEENUM_TAG in h):
+			# Find all custom content in one pass over the lines, in file order
+			(self.includes, self.type_enums, self.functions), _ = self._find_custom_sections(_split_lines(h), [
+				(_INCL_START, _INCL_END),
+				(_TYPEENUM_START, _TYPEENUM_END),
+				(_FUNC_START, _FUNC_END),
+			])
+		else:
+			# No markers at all, so skip the line scans
+			self.includes = []
+			self.type_enums = []
+			self.functions = []
 
 		print("\t[ DONE ]")
 
@@ -20,6 +20,8 @@
 # subcontract 1658085.
 #
 
+import functools
+
 import camp.generators.lib.camputil as cu
 
 
@@ -61,6 +63,15 @@ collections[LIT]   = {"ari_type":"3"}
 collections[RPT]   = {"ari_type":"6"}
 collections[TBL]   = {"sname":"tbl", "ari_type":"9"}
 
+# Reverse index of the upper-cased long and short names to their collection;
+# the first collection to use a name takes it
+_NAME_TO_COLL = {}
+for _coll, _value in collections.items():
+    for _key in ("lname", "sname"):
+        if _key in _value:
+            _NAME_TO_COLL.setdefault(_value[_key].upper(), _coll)
+del _coll, _value, _key
+
 
 #
 # Returns the area of the data type and its enumeration
@@ -95,6 +106,7 @@ def get_lname(coll):
 # Returns the amp_type variable name for the passed collection type
 # TODO: handle out of range
 #
+@functools.lru_cache(maxsize=None)
 def get_amp_type(coll):
     return cu.make_amp_type_name_from_str(collections[coll]["amp_type"])
 
@@ -108,6 +120,7 @@ def get_raw_amp_type(coll):
 # Returns the ADM_XX_IDX variable name for the passed collection type
 # TODO: handle out of range
 #
+@functools.lru_cache(maxsize=None)
 def get_adm_idx(coll):
     return "ADM_"+collections[coll]["adm_idx"].upper()+"_IDX"
 
@@ -116,10 +129,7 @@ def get_adm_idx(coll):
 # Returns None if the name is not present
 #
 def name_get_coll(name):
-    for key, value in collections.items():
-        if(value["lname"].upper() == name.upper() or value["sname"].upper() == name.upper()):
-            return key
-    return None
+    return _NAME_TO_COLL.get(name.upper())
 
 
 
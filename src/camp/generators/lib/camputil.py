@@ -20,6 +20,7 @@
 # subcontract 1658085.
 #
 
+import functools
 import json
 import re
 import os
@@ -32,6 +33,7 @@ import camp.generators.lib.campsettings as cs
 
 # XXX: these functions could be updated and put into the retriever class.
 
+@functools.lru_cache(maxsize=None)
 def get_g_var_idx(ns):
     ns = ns.lower().replace("/", "_")
     return "g_" + ns + "_idx"
@@ -51,6 +53,7 @@ def ari_get_names(jari):
 # collection the item belongs to (cs.[EDD|VAR|...]), item is the item to
 # make the ari for i_name is the name of the item
 #
+@functools.lru_cache(maxsize=4096)
 def make_ari_name_from_str(name, coll, i_name):
     name = name.replace("/", "_")
     template = "{0}_{1}_{2}"
@@ -70,6 +73,7 @@ def make_ari_name(name, coll, item):
 # Makes and returns the amp type string for the passed item
 # t_name is the name of the type
 #
+@functools.lru_cache(maxsize=None)
 def make_amp_type_name_from_str(t_name):
     return "AMP_TYPE_{}".format(t_name.upper())
 
@@ -77,5 +81,6 @@ def make_amp_type_name_from_str(t_name):
 # Makes and returns the adm enum type string for the passed
 # item. name is the name of the item
 #
+@functools.lru_cache(maxsize=None)
 def make_enum_name_from_str(name):
     return "ADM_ENUM_{}".format(name.upper())
@@ -36,20 +36,11 @@
 #####################################################################
 
 import argparse
+import io
 import logging
 import os
 import re
 import sys
-import ace
-# Import all generators
-from camp.generators import (
-    create_gen_h,
-    create_agent_c,
-    create_mgr_c,
-    create_impl_h,
-    create_impl_c,
-    create_sql,
-)
 from camp.generators.lib import campsettings
 
 
@@ -83,12 +74,11 @@ def get_parser() -> argparse.ArgumentParser:
 # d_name is the path to the output directory
 #
 def set_up_outputdir(d_name):
-    if(not os.path.isdir(d_name)):
-        try:
-            os.makedirs(d_name)
-        except OSError as e:
-            LOGGER.error("[ Error ] Failed to make output directory")
-            raise
+    try:
+        os.makedirs(d_name, exist_ok=True)
+    except OSError as e:
+        LOGGER.error("[ Error ] Failed to make output directory")
+        raise
 
 
 #
@@ -112,6 +102,20 @@ def run(args: argparse.Namespace):
         LOGGER.error("Config error: %s", e)
         return 1
 
+    # Deferred until needed because ace pulls in SQLAlchemy, and only the
+    # generators selected by the --only-* options are used
+    import ace
+    if not args.only_sql:
+        from camp.generators import (
+            create_gen_h,
+            create_agent_c,
+            create_mgr_c,
+            create_impl_h,
+            create_impl_c,
+        )
+    if not args.only_ch:
+        from camp.generators import create_sql
+
     try:
         admset = ace.AdmSet()
         LOGGER.info("Loading %s ... ", args.admfile)
@@ -143,18 +147,21 @@ def run(args: argparse.Namespace):
             create_sql.Writer(admset, adm, args.out, dialect='pgsql')
         ]
 
-    failures = 0
-    for gen in generators:
-        file_path = gen.file_path()
-        dir_path = os.path.dirname(file_path)
-        if not os.path.exists(dir_path):
-            os.makedirs(dir_path)
+    # Resolve every output path once and create each distinct directory once
+    gen_paths = [(gen, gen.file_path()) for gen in generators]
+    for dir_path in {os.path.dirname(file_path) for _, file_path in gen_paths}:
+        os.makedirs(dir_path, exist_ok=True)
 
+    failures = 0
+    for gen, file_path in gen_paths:
         try:
-            LOGGER.info('Generating %s ...', os.path.relpath(file_path, args.out))
+            # Stage the whole file in memory so it is written out in one call
+            buf = io.StringIO()
+            gen.write(buf)
             with open(file_path, "w") as outfile:
-                gen.write(outfile)
-            LOGGER.info('done.')
+                outfile.write(buf.getvalue())
+            if LOGGER.isEnabledFor(logging.INFO):
+                LOGGER.info('Generated %s', os.path.relpath(file_path, args.out))
         except IOError as err:
             LOGGER.error("Failed to open %s for writing: %s", file_path, err)
             failures += 1
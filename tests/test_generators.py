@@ -22,13 +22,12 @@
 ''' Verify behavior of the "camp" command tool.
 '''
 import argparse
-import datetime
 import io
 import logging
 import os
 import sys
+import stat
 import unittest
-import jinja2
 from ace import AdmSet, Checker
 from camp.generators.lib.campch_roundtrip import H_Scraper, C_Scraper
 from camp.generators import (
@@ -39,7 +38,7 @@ from camp.generators import (
     create_impl_h,
     create_impl_c,
 )
-from .util import TmpDir
+from .util import TmpDir, TODAY, render_expected
 
 
 LOGGER = logging.getLogger(__name__)
@@ -51,37 +50,40 @@ class BaseTest(unittest.TestCase):
     ''' Abstract base for generators
     '''
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self._tmpl_env = jinja2.Environment(
-            loader=jinja2.FileSystemLoader(os.path.join(SELFDIR, 'data')),
-            keep_trailing_newline=True
-        )
+    #: ADM set shared by all generator test classes, created on first use
+    _admset = None
+    #: Loaded ADMs in the shared set, by file name
+    _adms = {}
+
+    @classmethod
+    def setUpClass(cls):
+        # The ADMs are only read by the generators, so each is loaded once
+        # into an in-memory set shared across the test classes
+        if BaseTest._admset is None:
+            BaseTest._admset = AdmSet(cache_dir=False)
 
     def setUp(self):
         self.maxDiff = None
         #logging.getLogger('sqlalchemy.engine').setLevel(logging.INFO)
         self._dir = TmpDir()
-        self._admset = AdmSet()
-
-    def tearDown(self):
-        del self._dir
+        self.addCleanup(self._dir.close)
 
     def _get_adm(self, file_name):
-        ''' Read an ADM file from the 'tests/data' directory.
+        ''' Read an ADM file from the 'tests/data' directory, or reuse it
+        if already read by any test class.
         '''
-        admfile = os.path.join(SELFDIR, 'data', file_name)
-        LOGGER.info("Loading %s ... ", admfile)
-        adm = self._admset.load_from_file(admfile)
-        errs = Checker(self._admset.db_session()).check(adm)
-        self.assertEqual([], errs)
+        adm = self._adms.get(file_name)
+        if adm is None:
+            admfile = os.path.join(SELFDIR, 'data', file_name)
+            LOGGER.info("Loading %s ... ", admfile)
+            adm = self._admset.load_from_file(admfile)
+            # The fixture ADMs are fixed, so only check them when asked to
+            if os.environ.get('CAMP_TEST_CHECK_ADMS'):
+                errs = Checker(self._admset.db_session()).check(adm)
+                self.assertEqual([], errs)
+            self._adms[file_name] = adm
         return adm
 
-    def _today_datestamp(self):
-        ''' Get a datestamp for files created today.
-        '''
-        return datetime.date.today().strftime('%Y-%m-%d')
-
 
 class TestCreateSql(BaseTest):
 
@@ -98,94 +100,244 @@ class TestCreateSql(BaseTest):
         buf = io.StringIO()
         writer.write(buf)
 
-        tmpl = self._tmpl_env.get_template('test_adm.pgsql.sql.jinja')
-        content = tmpl.render(datestamp=self._today_datestamp())
+        content = render_expected('test_adm.pgsql.sql.jinja', TODAY)
         self.assertEqual(content, buf.getvalue())
 
+    def test_create_sql_macros(self):
+        adm = self._get_adm('test_mac_adm.json')
+        outdir = os.path.join(os.environ['XDG_DATA_HOME'], 'out')
 
-class TestCreateCH(BaseTest):
+        writer = create_sql.Writer(self._admset, adm, outdir, dialect='pgsql')
+        buf = io.StringIO()
+        writer.write(buf)
 
-    def test_create_impl_h_noscrape(self):
-        adm = self._get_adm('test_adm.json')
-        outdir = os.path.join(os.environ['XDG_DATA_HOME'], 'out')
+        content = buf.getvalue()
+        self.assertIn(
+            "CALL SP__insert_formal_parmspec(1, 'parms for the reset_count macro', fp_spec_id);",
+            content
+        )
+        # Each macro sets its own AC id before using it for its entries and definition
+        cases = [
+            ('reset_all', 'Reset without parameters.', 'null'),
+            ('reset_count', 'Reset with a parameter.', 'fp_spec_id'),
+        ]
+        for name, desc, fp_spec_id in cases:
+            with self.subTest(name=name):
+                start = content.index(f"CALL SP__insert_obj_metadata(4, '{name}',")
+                ac_id_idx = content.index(f"CALL SP__insert_ac_id(1, 'ac for {name} macro', mac_ac_id);", start)
+                entry_idx = content.index(
+                    "CALL SP__insert_ac_formal_entry(mac_ac_id, test_mac_ns_ctrl_reset, 1, r_ac_entry_id);",
+                    start
+                )
+                def_idx = content.index(
+                    f"CALL SP__insert_macro_formal_definition(test_mac_ns_mac_{name}, '{desc}',"
+                    f" {fp_spec_id}, 0, mac_ac_id, test_mac_ns_mac_{name}_did);",
+                    start
+                )
+                self.assertLess(ac_id_idx, entry_idx)
+                self.assertLess(entry_idx, def_idx)
+
+
+class TestSqlFilePatch(BaseTest):
+    ''' Verify the editing of existing scripts that source the SQL files.
+    '''
 
-        writer = create_impl_h.Writer(self._admset, adm, outdir, H_Scraper(None))
+    ANCHOR = "-- End Insert Agent Scripts\n"
+
+    def _make_file(self, content):
+        path = os.path.join(os.environ['XDG_DATA_HOME'], 'setup.mysql')
+        os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as outfile:
+            outfile.write(content)
+        return path
+
+    def _read_file(self, path):
+        with open(path, 'r') as infile:
+            return infile.read()
+
+    def test_insert_middle(self):
+        path = self._make_file("source a.sql\n" + self.ANCHOR + "tail\n")
         self.assertEqual(
-            os.path.join(outdir, 'agent', 'adm_test_adm_impl.h'),
-            writer.file_path()
+            create_sql.LINE_INSERTED,
+            create_sql.insert_line_before_anchor(path, "source b.sql\n", "End Insert Agent Scripts")
+        )
+        self.assertEqual(
+            "source a.sql\nsource b.sql\n" + self.ANCHOR + "tail\n",
+            self._read_file(path)
         )
 
-        buf = io.StringIO()
-        writer.write(buf)
+    def test_insert_first_line(self):
+        path = self._make_file(self.ANCHOR)
+        self.assertEqual(
+            create_sql.LINE_INSERTED,
+            create_sql.insert_line_before_anchor(path, "source b.sql\n", "End Insert Agent Scripts")
+        )
+        self.assertEqual("source b.sql\n" + self.ANCHOR, self._read_file(path))
 
-        tmpl = self._tmpl_env.get_template('gen_ch/agent/adm_test_adm_impl.h.jinja')
-        content = tmpl.render(datestamp=self._today_datestamp())
-        self.assertEqual(content, buf.getvalue())
+    def test_insert_anchor_mid_line(self):
+        # The new line goes in front of the whole line holding the anchor
+        path = self._make_file("source a.sql\n  " + self.ANCHOR)
+        create_sql.insert_line_before_anchor(path, "source b.sql\n", "End Insert Agent Scripts")
+        self.assertEqual("source a.sql\nsource b.sql\n  " + self.ANCHOR, self._read_file(path))
 
-    def test_create_impl_c_noscrape(self):
-        adm = self._get_adm('test_adm.json')
-        outdir = os.path.join(os.environ['XDG_DATA_HOME'], 'out')
+    def test_already_present(self):
+        content = "source b.sql\n" + self.ANCHOR
+        path = self._make_file(content)
+        self.assertEqual(
+            create_sql.LINE_PRESENT,
+            create_sql.insert_line_before_anchor(path, "source b.sql\n", "End Insert Agent Scripts")
+        )
+        self.assertEqual(content, self._read_file(path))
 
-        writer = create_impl_c.Writer(self._admset, adm, outdir, C_Scraper(None))
+    def test_anchor_missing(self):
+        content = "source a.sql\n"
+        path = self._make_file(content)
         self.assertEqual(
-            os.path.join(outdir, 'agent', 'adm_test_adm_impl.c'),
-            writer.file_path()
+            create_sql.ANCHOR_MISSING,
+            create_sql.insert_line_before_anchor(path, "source b.sql\n", "End Insert Agent Scripts")
+        )
+        self.assertEqual(content, self._read_file(path))
+
+    def test_insert_keeps_mode(self):
+        path = self._make_file(self.ANCHOR)
+        os.chmod(path, 0o755)
+        create_sql.insert_line_before_anchor(path, "source b.sql\n", "End Insert Agent Scripts")
+        self.assertEqual(0o755, stat.S_IMODE(os.stat(path).st_mode))
+        self.assertEqual(['setup.mysql'], os.listdir(os.path.dirname(path)))
+
+    def test_add_to_setup_mysql(self):
+        path = self._make_file(self.ANCHOR)
+        create_sql.Writer.add_to_setup_mysql(path, "Agent_Scripts/adm_test_adm.sql")
+        create_sql.Writer.add_to_setup_mysql(path, "Agent_Scripts/adm_test_adm.sql")
+        self.assertEqual("source Agent_Scripts/adm_test_adm.sql\n" + self.ANCHOR, self._read_file(path))
+
+    def test_add_to_setup_mysql_anchor_missing(self):
+        path = self._make_file("source a.sql\n")
+        with self.assertLogs(create_sql.LOGGER, logging.WARNING):
+            create_sql.Writer.add_to_setup_mysql(path, "Agent_Scripts/adm_test_adm.sql")
+        self.assertEqual("source a.sql\n", self._read_file(path))
+
+    def test_add_to_dockerfile(self):
+        path = self._make_file(self.ANCHOR)
+        create_sql.Writer.add_to_dockerfile(path, "Agent_Scripts/adm_test_adm.sql")
+        self.assertEqual(
+            "      - ${PWD}/Agent_Scripts/adm_test_adm.sql:/docker-entrypoint-initdb.d/30-adm_test_adm.sql\n"
+            + self.ANCHOR,
+            self._read_file(path)
         )
 
-        buf = io.StringIO()
-        writer.write(buf)
 
-        tmpl = self._tmpl_env.get_template('gen_ch/agent/adm_test_adm_impl.c.jinja')
-        content = tmpl.render(datestamp=self._today_datestamp())
-        self.assertEqual(content, buf.getvalue())
+class TestCreateCH(BaseTest):
 
-    def test_create_gen_h(self):
+    def test_create_ch(self):
         adm = self._get_adm('test_adm.json')
         outdir = os.path.join(os.environ['XDG_DATA_HOME'], 'out')
 
-        writer = create_gen_h.Writer(self._admset, adm, outdir)
-        self.assertEqual(
-            os.path.join(outdir, 'shared', 'adm', 'adm_test_adm.h'),
-            writer.file_path()
-        )
+        # Each writer with its extra arguments, expected file path, and template
+        cases = [
+            (create_impl_h.Writer, [H_Scraper(None)], ['agent', 'adm_test_adm_impl.h'],
+             'gen_ch/agent/adm_test_adm_impl.h.jinja'),
+            (create_impl_c.Writer, [C_Scraper(None)], ['agent', 'adm_test_adm_impl.c'],
+             'gen_ch/agent/adm_test_adm_impl.c.jinja'),
+            (create_gen_h.Writer, [], ['shared', 'adm', 'adm_test_adm.h'],
+             'gen_ch/shared/adm/adm_test_adm.h.jinja'),
+            (create_mgr_c.Writer, [], ['mgr', 'adm_test_adm_mgr.c'],
+             'gen_ch/mgr/adm_test_adm_mgr.c.jinja'),
+            (create_agent_c.Writer, [], ['agent', 'adm_test_adm_agent.c'],
+             'gen_ch/agent/adm_test_adm_agent.c.jinja'),
+        ]
+        for writer_cls, writer_args, path_parts, tmpl_name in cases:
+            with self.subTest(name=tmpl_name):
+                writer = writer_cls(self._admset, adm, outdir, *writer_args)
+                self.assertEqual(
+                    os.path.join(outdir, *path_parts),
+                    writer.file_path()
+                )
+
+                buf = io.StringIO()
+                writer.write(buf)
+
+                content = render_expected(tmpl_name, TODAY)
+                self.assertEqual(content, buf.getvalue())
+
+    def test_create_impl_h_scrape(self):
+        adm = self._get_adm('test_adm.json')
+        outdir = os.path.join(os.environ['XDG_DATA_HOME'], 'out')
 
+        writer = create_impl_h.Writer(self._admset, adm, outdir, H_Scraper(None))
         buf = io.StringIO()
         writer.write(buf)
+        # Add custom content to the previously generated file
+        edited = buf.getvalue().replace(
+            "/*   START typeENUM */\n/*             TODO              */\n",
+            "/*   START typeENUM */\nenum custom_e { CUSTOM_A };\n"
+        )
+        os.makedirs(os.path.dirname(writer.file_path()))
+        with open(writer.file_path(), 'w') as outfile:
+            outfile.write(edited)
 
-        tmpl = self._tmpl_env.get_template('gen_ch/shared/adm/adm_test_adm.h.jinja')
-        content = tmpl.render(datestamp=self._today_datestamp())
-        self.assertEqual(content, buf.getvalue())
+        writer = create_impl_h.Writer(self._admset, adm, outdir, True)
+        buf = io.StringIO()
+        writer.write(buf)
+        self.assertEqual(edited, buf.getvalue())
 
-    def test_create_mgr_c(self):
+    def test_create_impl_c_scrape(self):
         adm = self._get_adm('test_adm.json')
         outdir = os.path.join(os.environ['XDG_DATA_HOME'], 'out')
 
-        writer = create_mgr_c.Writer(self._admset, adm, outdir)
-        self.assertEqual(
-            os.path.join(outdir, 'mgr', 'adm_test_adm_mgr.c'),
-            writer.file_path()
+        writer = create_impl_c.Writer(self._admset, adm, outdir, C_Scraper(None))
+        buf = io.StringIO()
+        writer.write(buf)
+        # Add custom content to the previously generated file
+        edited = buf.getvalue().replace(
+            "/*   START CUSTOM INCLUDES HERE  */\n/*             TODO              */\n",
+            "/*   START CUSTOM INCLUDES HERE  */\n#include \"custom.h\"\n"
+        ).replace(
+            "|START CUSTOM FUNCTION setup BODY\n\t * +-------------------------------------------------------------------------+\n\t */\n",
+            "|START CUSTOM FUNCTION setup BODY\n\t * +-------------------------------------------------------------------------+\n\t */\n\tcustom_setup();\n"
         )
+        os.makedirs(os.path.dirname(writer.file_path()))
+        with open(writer.file_path(), 'w') as outfile:
+            outfile.write(edited)
 
+        writer = create_impl_c.Writer(self._admset, adm, outdir, True)
         buf = io.StringIO()
         writer.write(buf)
+        self.assertIn("\n#include \"custom.h\"\n", buf.getvalue())
+        self.assertIn("\tcustom_setup();\n", buf.getvalue())
+        self.assertEqual(edited, buf.getvalue())
 
-        tmpl = self._tmpl_env.get_template('gen_ch/mgr/adm_test_adm_mgr.c.jinja')
-        content = tmpl.render(datestamp=self._today_datestamp())
-        self.assertEqual(content, buf.getvalue())
-
-    def test_create_agent_c(self):
-        adm = self._get_adm('test_adm.json')
+    def test_create_agent_c_macros(self):
+        adm = self._get_adm('test_mac_adm.json')
         outdir = os.path.join(os.environ['XDG_DATA_HOME'], 'out')
 
         writer = create_agent_c.Writer(self._admset, adm, outdir)
-        self.assertEqual(
-            os.path.join(outdir, 'agent', 'adm_test_adm_agent.c'),
-            writer.file_path()
+        buf = io.StringIO()
+        writer.write(buf)
+
+        content = buf.getvalue()
+        self.assertIn(
+            "\n\tdef = macdef_create(1, adm_build_ari(AMP_TYPE_MAC, 0, g_test_mac_ns_idx[ADM_MAC_IDX], TEST_MAC_NS_MAC_RESET_ALL));"
+            "\n\tadm_add_macdef_ctrl(def, adm_build_ari(AMP_TYPE_CTRL, 0, g_test_mac_ns_idx[ADM_CTRL_IDX], TEST_MAC_NS_CTRL_RESET));"
+            "\n\tadm_add_macdef(def);",
+            content
         )
+        self.assertIn(
+            "\n\tdef = macdef_create(1, adm_build_ari(AMP_TYPE_MAC, 1, g_test_mac_ns_idx[ADM_MAC_IDX], TEST_MAC_NS_MAC_RESET_COUNT));",
+            content
+        )
+
+    def test_create_mgr_c_macros(self):
+        adm = self._get_adm('test_mac_adm.json')
+        outdir = os.path.join(os.environ['XDG_DATA_HOME'], 'out')
 
+        writer = create_mgr_c.Writer(self._admset, adm, outdir)
         buf = io.StringIO()
         writer.write(buf)
 
-        tmpl = self._tmpl_env.get_template('gen_ch/agent/adm_test_adm_agent.c.jinja')
-        content = tmpl.render(datestamp=self._today_datestamp())
-        self.assertEqual(content, buf.getvalue())
+        content = buf.getvalue()
+        self.assertIn(
+            "\n\tmeta = meta_add_macro(def->ari, ADM_ENUM_TEST_MAC_NS, \"reset_count\", \"Reset with a parameter.\");"
+            "\n\tmeta_add_parm(meta, \"count\", AMP_TYPE_UINT);",
+            content
+        )
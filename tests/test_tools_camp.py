@@ -22,16 +22,15 @@
 ''' Verify behavior of the "camp" command tool.
 '''
 import argparse
-import datetime
 import io
-import jinja2
 import logging
 import os
+import pathlib
 import sys
 from typing import List
 import unittest
 import camp.tools.camp
-from .util import TmpDir
+from .util import TmpDir, TODAY, render_expected
 
 
 LOGGER = logging.getLogger(__name__)
@@ -41,40 +40,35 @@ SELFDIR = os.path.dirname(__file__)
 
 class TestCamp(unittest.TestCase):
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self._tmpl_env = jinja2.Environment(
-            loader=jinja2.FileSystemLoader(os.path.join(SELFDIR, 'data')),
-            keep_trailing_newline=True
-        )
-
     def setUp(self):
         self.maxDiff = None
         #logging.getLogger('sqlalchemy.engine').setLevel(logging.INFO)
         self._dir = TmpDir()
-
-    def tearDown(self):
-        del self._dir
+        self.addCleanup(self._dir.close)
 
     def _walk_files(self, path: str) -> List[str]:
         ''' Print out a list of file contents for test writer use and
         return the full set of relative paths found.
         '''
         relpaths = []
-        for root_path, dirs, files in os.walk(path):
-            for file_name in files:
-                file_path = os.path.join(root_path, file_name)
-                relpaths.append(os.path.relpath(file_path, path))
-                LOGGER.info('Contents of %s', file_path)
-                with open(file_path, 'r') as infile:
-                    LOGGER.info('\n%s', infile.read())
+        dir_paths = [path]
+        while dir_paths:
+            try:
+                entries = os.scandir(dir_paths.pop())
+            except OSError:
+                # Like os.walk(), ignore a missing output directory
+                continue
+            with entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        dir_paths.append(entry.path)
+                    elif entry.is_file():
+                        relpaths.append(os.path.relpath(entry.path, path))
+                        if LOGGER.isEnabledFor(logging.INFO):
+                            LOGGER.info('Contents of %s', entry.path)
+                            LOGGER.info('\n%s', pathlib.Path(entry.path).read_text())
         return sorted(relpaths)
 
-    def _today_datestamp(self):
-        ''' Get a datestamp for files created today.
-        '''
-        return datetime.date.today().strftime('%Y-%m-%d')
-
     def test_parser(self):
         parser = camp.tools.camp.get_parser()
         self.assertIsInstance(parser, argparse.ArgumentParser)
@@ -86,20 +80,17 @@ class TestCamp(unittest.TestCase):
         args.only_sql = True
         args.only_ch = False
         args.nickname = 9999
-        try:
-            exitcode = camp.tools.camp.run(args)
-            self.assertEqual(0, exitcode)
-        finally:
-            got_files = self._walk_files(args.out)
+        exitcode = camp.tools.camp.run(args)
+        self.assertEqual(0, exitcode)
+        got_files = self._walk_files(args.out)
         expect_files = [
             'amp-sql/Agent_Scripts/adm_test_adm.sql',
         ]
         self.assertEqual(expect_files, got_files)
 
-        with open(os.path.join(args.out, 'amp-sql', 'Agent_Scripts', 'adm_test_adm.sql'), 'r') as out:
-            tmpl = self._tmpl_env.get_template('test_adm.pgsql.sql.jinja')
-            content = tmpl.render(datestamp=self._today_datestamp())
-            self.assertEqual(content, out.read())
+        content = render_expected('test_adm.pgsql.sql.jinja', TODAY)
+        actual = pathlib.Path(args.out, 'amp-sql', 'Agent_Scripts', 'adm_test_adm.sql').read_text()
+        self.assertEqual(content, actual)
 
     def test_run_ch_new(self):
         args = argparse.Namespace()
@@ -109,11 +100,9 @@ class TestCamp(unittest.TestCase):
         args.only_ch = True
         args.nickname = 9999
         args.scrape = False
-        try:
-            exitcode = camp.tools.camp.run(args)
-            self.assertEqual(0, exitcode)
-        finally:
-            got_files = self._walk_files(args.out)
+        exitcode = camp.tools.camp.run(args)
+        self.assertEqual(0, exitcode)
+        got_files = self._walk_files(args.out)
         expect_files = [
             'agent/adm_test_adm_agent.c',
             'agent/adm_test_adm_impl.c',
@@ -21,21 +21,70 @@
 #
 ''' Shared test fixture utilities.
 '''
+import datetime
+import functools
 import os
 import tempfile
+from unittest import mock
+import jinja2
+
+#: Environment for the expected-output templates in the 'tests/data'
+#: directory, shared by all tests so that each template is compiled once.
+#: Compiled templates are also cached on disk for later test runs.
+TMPL_ENV = jinja2.Environment(
+    loader=jinja2.FileSystemLoader(os.path.join(os.path.dirname(__file__), 'data')),
+    keep_trailing_newline=True,
+    auto_reload=False,
+    bytecode_cache=jinja2.FileSystemBytecodeCache()
+)
+
+#: Datestamp for files created today, fixed when the tests start
+TODAY = datetime.date.today().strftime('%Y-%m-%d')
+
+
+@functools.lru_cache(maxsize=None)
+def render_expected(tmpl_name: str, datestamp: str) -> str:
+    ''' Render an expected-output template, reusing earlier renders.
+
+    :param tmpl_name: The template name within the 'tests/data' directory.
+    :param datestamp: The date text to substitute into the template.
+    :return: The rendered text.
+    '''
+    return TMPL_ENV.get_template(tmpl_name).render(datestamp=datestamp)
+
+
+#: Parent for temporary test directories; RAM-backed where available, or
+#: None to use the default temporary location
+TMP_PARENT = '/dev/shm' if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK) else None
 
 
 class TmpDir:
     ''' A temporary test directory with associated XDG environment.
+    The directory is removed and the environment restored by :meth:`close`,
+    either directly or by using this object as a context manager.
 
     :param kwargs: Arguments to pass down to :class:`tempfile.TemporaryDirectory`.
+        Unless given, the directory is created under :data:`TMP_PARENT`.
     '''
 
     def __init__(self, **kwargs):
+        kwargs.setdefault('dir', TMP_PARENT)
         self._dir = tempfile.TemporaryDirectory(**kwargs)  # pylint: disable=consider-using-with
-        os.environ['XDG_CACHE_HOME'] = os.path.join(self._dir.name, 'home', 'cache')
-        os.environ['XDG_DATA_HOME'] = os.path.join(self._dir.name, 'home', 'data')
-        os.environ['XDG_DATA_DIRS'] = os.path.join(self._dir.name, 'usr', 'data')
+        self._env = mock.patch.dict(os.environ, {
+            'XDG_CACHE_HOME': os.path.join(self._dir.name, 'home', 'cache'),
+            'XDG_DATA_HOME': os.path.join(self._dir.name, 'home', 'data'),
+            'XDG_DATA_DIRS': os.path.join(self._dir.name, 'usr', 'data'),
+        })
+        self._env.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_args):
+        self.close()
 
-    def __del__(self):
+    def close(self):
+        ''' Restore the environment and remove the directory.
+        '''
+        self._env.stop()
         self._dir.cleanup()